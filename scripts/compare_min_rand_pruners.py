@@ -13,14 +13,6 @@ import pandas as pd
 import numpy as np
 import cobra
 
-# count number of 1s in a reaction-inclusion vector
-def count_included_rxns(rxn_incl):
-    count = 0
-    for bit in [int(rxn) for rxn in list(rxn_incl)]:
-        if bit == 1:
-            count += 1
-    return(count)
-
 # randomly prune a universal network several times and return all of the 
 # pruned networks, their reaction inclusion vectors, and their reaction counts
 def do_many_rand_prunes(full_model, bm_rxn, reps):
@@ -40,7 +32,6 @@ def do_many_rand_prunes(full_model, bm_rxn, reps):
         # reaction presence bitstrings. 
         # We also want to keep track of how many times we see each model, so we 
         # will make a dict with the bitstrings as keys
-        # sort is in-place
         rxn_incl = scn.make_rxn_incl(full_model, pruned_net)
         if rxn_incl not in pruned_counts_dict.keys():
             # make sure all reaction lists are sorted so that all isomorphic
@@ -140,6 +131,10 @@ min_no_export_rxn_incl = scn.make_rxn_incl(
     min_pruned_no_export
 )
 
+# random prunes of the same network keep asking which knockouts stop biomass
+# production, so remember the answers instead of re-solving every time
+scn.use_feasibility_cache(scn.FeasibilityCache())
+
 # randomly prune each network as many times as specified
 print('Randomly pruning with export reactions.')
 (
@@ -182,8 +177,10 @@ no_export_df['export'] = ['no export'] * (len(rand_no_export_prune_counts) + 1)
 export_df['pruner'] = ['random'] * len(rand_export_prune_counts) + ['min flux']
 no_export_df['pruner'] = ['random'] * len(rand_no_export_prune_counts) + ['min flux']
 # add column of reaction counts
-export_df['rxn_count'] = list(map(count_included_rxns, export_df.rxn_incl))
-no_export_df['rxn_count'] = list(map(count_included_rxns, no_export_df.rxn_incl))
+export_df['rxn_count'] = [rxn_incl.count() for rxn_incl in export_df.rxn_incl]
+no_export_df['rxn_count'] = [
+    rxn_incl.count() for rxn_incl in no_export_df.rxn_incl
+]
 
 # concatenate dataframes and write to file
 all_data = export_df.append(no_export_df)
@@ -192,7 +189,8 @@ all_data.to_csv(
     index = False
 )
 
-# write stoichiometric matrices to files
+# write stoichiometric matrices to files; reaction-inclusion vectors are in
+# the same order as the models' reactions, so the columns line up with them
 np.savetxt(
     f'data/{monos}_{max_pol}_{ins}ins_{outs}outs_exp_full_S.csv',
     cobra.util.create_stoichiometric_matrix(export_model), 
@@ -0,0 +1,38 @@
+# convert_sweep_csvs.py
+'''
+Convert CSVs written by older versions of run_sweep (e.g. old figure_4_data.py
+or multiple_env_min_prune.py output), which have a string of 0s and 1s for
+each reaction-inclusion vector, to the much smaller ResultStores (directories
+of Parquet files) run_sweep writes now, so the plotting scripts can read them.
+The old vectors had their entries in order of reaction id, so the universal
+network they came from is made again to put them in the order they're in now.
+Each file.csv becomes file.parquet
+'''
+
+import sys
+import string_chem_net as scn
+
+try:
+    (monos, max_pol, export) = sys.argv[1:4]
+    csv_paths = sys.argv[4:]
+except ValueError:
+    csv_paths = list()
+if len(csv_paths) == 0:
+    sys.exit('Arguments:\nmonomers\nmax polymer length\n' +
+        'does the universal network have an export reaction for every ' +
+        'metabolite? (yes/no)\none or more CSVs to convert')
+
+if export == 'yes':
+    allow_export = True
+elif export == 'no':
+    allow_export = False
+else:
+    sys.exit('The export argument must be either "yes" or "no"')
+
+(SCN, universal_model) = scn.load_network(
+    monos, int(max_pol), allow_export = allow_export
+)
+rxn_index = scn.ReactionIndex(universal_model)
+for csv_path in csv_paths:
+    out_path = scn.convert_sweep_csv(csv_path, rxn_index)
+    print(f'Converted {csv_path} to {out_path}')
@@ -8,28 +8,28 @@ import string_chem_net as scn
 import random
 import cobra
 
-# given a network and the food sources it should be capable of using, find all
-# reactions that can be removed from said network without removing its ability
-# to produce biomass given only those food sources
-# network must already have a biomass reaction set as its objective
-def find_prunables(network, foods, bm_rxn):
-    # list of reactions that could be removed from this network
-    could_drop = list()
+# given a network with a biomass reaction set as its objective, see if there's
+# at least one reaction that can be removed from it without removing its
+# ability to produce biomass (which also means it can produce biomass at all)
+def can_prune(network, bm_rxn):
     for rxn in network.reactions:
         # don't try to remove the biomass reaction
         if rxn.id == bm_rxn.id:
             continue
-        # reaction removal happens in-place
-        network.remove_reactions([rxn])
+        # knock the reaction out by setting its bounds to zero instead of
+        # removing it, so the solver doesn't have to rebuild its problem and
+        # can start from the last solution it found
+        old_bounds = rxn.bounds
+        rxn.bounds = (0, 0)
         # see if this network can produce biomass
         solution = network.optimize()
         bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
+        # regardless of whether this reaction was removeable or not, put its
+        # bounds back
+        rxn.bounds = old_bounds
         if solution.status != 'infeasible' and bm_rxn_flux > 10e-10:
-            could_drop.append(rxn)
-        # regardless of whether this reaction was removeable or not, add it 
-        # back to the network so we can try another one
-        network.add_reaction(rxn)
-    return(could_drop)
+            return(True)
+    return(False)
 
 # get command-line arguments
 try:
@@ -59,15 +59,16 @@ for food in foods:
 # with randomly-chosen food metabolites, you'll frequently get no feasible
 # solutions even on the complete network, especially for small networks, so
 # keep choosing new food sources and biomass reactions until one combo
-# actually works
-could_remove = find_prunables(cobra_model, foods, bm_rxn)
+# actually works (and has at least one reaction that can be pruned)
 i = 0
-while could_remove == list():
+while not can_prune(cobra_model, bm_rxn):
     i += 1
     if i % 100 == 0:
         print(f'On the {i}th combination of foods and biomass')
     # remove existing food input reactions
-    cobra_model.remove_reactions(cobra_model.boundary)
+    cobra_model.remove_reactions(
+        [rxn for rxn in cobra_model.boundary if rxn.id.startswith('->')]
+    )
     foods = random.sample(cobra_model.metabolites, int(ins))
     for food in foods:
         # add an input reaction for this metabolite
@@ -81,7 +82,6 @@ while could_remove == list():
     cobra_model.remove_reactions([bm_rxn])
     bm_rxn = scn.choose_bm_mets(int(outs), cobra_model)
     cobra_model.objective = bm_rxn
-    could_remove = find_prunables(cobra_model, foods, bm_rxn)
 
 print(
     f'Reselected foods and biomass precursors {i} times before getting a ' +
@@ -90,41 +90,9 @@ print(
 # now we can actually try to prune this network, since we know this combination
 # of food sources and biomass precursors has at least one feasible solution on
 # this network
-
-# list of all possible pruned networks from this network
-end_prunes = list()
-# at first we just have one network to find possible prunes for: the complete
-# network of all possible reactions
-networks = [cobra_model]
 print(f'{len(cobra_model.reactions)} reactions in full network')
-while len(networks) != 0:
-    print(f'Testing {len(networks)} networks')
-    # this will hold all networks that have one fewer reaction than the current
-    # network (or group of equally-sized networks) that still produce biomass
-    new_networks = list()
-    for network in networks:
-        # find all possible reactions that could be pruned from this network
-        # and add the networks missing those reactions to new_networks
-        could_drop = find_prunables(network, foods, bm_rxn)
-        if could_drop == list():
-            # if no reactions could be removed from this network, add it to the
-            # list of completely-pruned networks
-            end_prunes.append(network)
-            # if all the networks are like this, then new_networks will remain
-            # an empty list and we'll exit the while loop
-        else:
-            for rxn in could_drop:
-                # removing reactions happens in-place, so we need to make a new
-                # network each time we want to prune
-                pruned = network.copy()
-                # annoyingly, the reaction object from "network" won't exist in
-                # "pruned", but it will have the same id as the relevant one in
-                # "pruned"
-                rxn = pruned.reactions.get_by_id(rxn.id)
-                pruned.remove_reactions([rxn])
-                new_networks.append(pruned)
-    # once you've gone through all the networks of this size, start over on all
-    # of the networks with one fewer reaction until there are no valid smaller
-    # networks
-    networks = new_networks
+# every network that can't have any more reactions removed from it without
+# losing the ability to make biomass, each found exactly once no matter how
+# many orders its reactions could have been removed in
+end_prunes = scn.enumerate_minimal_networks(cobra_model, bm_rxn)
 print(f'There were {len(end_prunes)} ways to prune this network.')
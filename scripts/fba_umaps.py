@@ -3,6 +3,7 @@
 
 import sys
 import pandas as pd
+import string_chem_net as scn
 import umap
 import numpy as np
 import matplotlib
@@ -11,13 +12,10 @@ from matplotlib import pyplot as plt
 # need name of file with multiple_env_prune output, name for the plot colored
 # by biomass reaction and name for the plot colored by environment
 def do_umap(filename, bm_plot_name, env_plot_name):
-    # get the reaction-inclusion vector out of the input file and make it into
-    # a bunch of 1/0 columns instead of one column of strings of 1s and 0s
-    data = pd.read_csv(filename)
-    # want each reaction bit in its own column and only pass those columns to umap
-    rxn_incl_cols = data['rxn_incl'].apply(lambda x: pd.Series(list(x)))
-    # first and last columns will be empty and all columns will be strings
-    umap_ready = rxn_incl_cols.iloc[:,1:-1].astype('int32')
+    # get the reaction-inclusion vectors out of the input file and make them
+    # into a matrix with a 1/0 column for every reaction to pass to umap
+    data = scn.read_results(filename)
+    umap_ready = scn.InclusionVector.stack(data['rxn_incl']).astype('int32')
 
     # do UMAP
     print('Doing UMAP')
@@ -74,12 +72,12 @@ def do_umap(filename, bm_plot_name, env_plot_name):
 
 # panels B and C are with export reactions, panels D and E are without
 do_umap(
-    'data/multiple_env_fba_ab_5_2ins_1000envs_5outs_10orgs_yesexp.csv',
+    'data/multiple_env_fba_ab_5_2ins_1000envs_5outs_10orgs_yesexp.parquet',
     'fba_export_biomass',
     'fba_export_env'
 )
 do_umap(
-    'data/multiple_env_fba_ab_5_2ins_1000envs_5outs_10orgs_noexp.csv',
+    'data/multiple_env_fba_ab_5_2ins_1000envs_5outs_10orgs_noexp.parquet',
     'fba_noexport_biomass',
     'fba_noexport_env'
 )
@@ -15,36 +15,33 @@ import cobra
 import pandas as pd
 import multiprocessing as mp
 
-def prune_once(universal_model, ins, outs, flux_bins, rep):
+def init_worker(shared_network, shared_oracle):
     '''
-    Given a universal string chemistry network, add a random biomass reaction
-    and random input reactions, make sure that combination can produce biomass,
-    prune the network, and return the degree and flux distributions of the 
-    pruned network
+    Make this worker's own copy of the universal network out of the arrays
+    the main process put in shared memory, so the model doesn't have to be
+    pickled and sent along with every round of pruning
+    '''
+    global universal_model, oracle
+    universal_model = shared_network.to_cobra()
+    oracle = shared_oracle
+
+def prune_once(ins, outs, flux_bins, rep):
+    '''
+    Given the universal string chemistry network (and a FeasibilityOracle for
+    it) set up by init_worker, add a random biomass reaction and random input
+    reactions, make sure that combination can produce biomass, prune the
+    network, and return the degree and flux distributions of the pruned
+    network
     '''
     # work with a copy of the model so it remains untouched for the next
     # iteration of the loop
     full_model = universal_model.copy()
     # randomly choose the appropriate number of input and output mets
     bm_rxn = scn.choose_bm_mets(outs, full_model)
-    scn.choose_inputs(ins, full_model, bm_rxn)
     full_model.objective = bm_rxn
-    # see if there's a feasible solution on the full model
-    solution = full_model.optimize()
-    # can't just check solution.status because sometimes it's feasible but the
-    # flux through the biomass reaction is vanishingly small
-    bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-    while solution.status == 'infeasible' or bm_rxn_flux < 10e-10:
-        # if the solution isn't feasible, pick a different environment
-        in_rxns = [
-            # don't want to remove all boundary reactions because that would
-            # also remove all of the export reactions
-            rxn for rxn in full_model.boundary if rxn.id.startswith('->')
-        ]
-        full_model.remove_reactions(in_rxns)
-        scn.choose_inputs(ins, full_model, bm_rxn)
-        solution = full_model.optimize()
-        bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
+    # keep choosing inputs until that combination can produce biomass on the
+    # full model (the oracle rules out most bad choices without doing FBA)
+    scn.choose_viable_inputs(ins, full_model, bm_rxn, oracle)
     # now that we know there's at least one environment that supports growth
     # with this biomass reaction, we can prune the universal network
     pruned_model = scn.min_flux_prune(full_model, bm_rxn)
@@ -174,15 +171,23 @@ reps = 100
 threads = 20
 
 SCN = scn.CreateNetwork(monos, max_pol)
-universal_model = scn.make_cobra_model(
-    SCN.met_list, 
-    SCN.rxn_list, 
-    allow_export = True
+# put the universal network in shared memory once instead of sending a copy of
+# the COBRApy model along with every round of pruning
+shared_network = scn.SharedNetwork(
+    scn.FluxNetwork.from_network(SCN, allow_export = True)
 )
+shared_oracle = scn.FeasibilityOracle.from_network(SCN, allow_export = True)
 # do the reps rounds of pruning in parallel
-pool = mp.Pool(threads)
-args = [(universal_model, ins, outs, flux_bins, i+1) for i in range(reps + 1)]
+pool = mp.Pool(
+    threads,
+    initializer = init_worker,
+    initargs = (shared_network, shared_oracle)
+)
+args = [(ins, outs, flux_bins, i+1) for i in range(reps + 1)]
 mixed_data = pool.starmap(prune_once, args)
+pool.close()
+pool.join()
+shared_network.unlink()
 # separate the three types of data from mixed_data
 scn_deg_dists = pd.concat([t[0] for t in mixed_data])
 scn_fluxes = pd.concat([t[1] for t in mixed_data])
@@ -4,6 +4,7 @@ Make several UMAPs visualizing the results of figure_4_data.py
 '''
 
 import pandas as pd
+import string_chem_net as scn
 import umap
 import numpy as np
 import matplotlib
@@ -11,13 +12,10 @@ from matplotlib import pyplot as plt
 
 # just need name of file with output
 def do_umap(filename):
-    # get the reaction-inclusion vector out of the input file and make it into
-    # a bunch of 1/0 columns instead of one column of strings of 1s and 0s
-    data = pd.read_csv(filename)
-    # want each reaction bit in its own column and only pass those columns to umap
-    rxn_incl_cols = data['rxn_incl'].apply(lambda x: pd.Series(list(x)))
-    # first and last columns will be empty and all columns will be strings
-    umap_ready = rxn_incl_cols.iloc[:,1:-1].astype('int32')
+    # get the reaction-inclusion vectors out of the input file and make them
+    # into a matrix with a 1/0 column for every reaction to pass to umap
+    data = scn.read_sweep(filename)
+    umap_ready = scn.InclusionVector.stack(data['rxn_incl']).astype('int32')
     # do UMAP
     reducer = umap.UMAP()
     umap_results = reducer.fit_transform(umap_ready)
@@ -107,8 +105,8 @@ def growth_plot(figure, axes, data, label):
 
 # get UMAP results for networks with and without export reactions
 print('Doing UMAP')
-export_umap = do_umap('data/figure_4_export_data.csv')
-no_export_umap = do_umap('data/figure_4_no_export_data.csv')
+export_umap = do_umap('data/figure_4_export_data.parquet')
+no_export_umap = do_umap('data/figure_4_no_export_data.parquet')
 
 print('Plotting UMAP results')
 # set up the subplots in a 3x2 grid
@@ -247,22 +247,21 @@ if __name__ == '__main__':
     SCN = scn.CreateNetwork(monos, int(max_len))
     cobra_model = scn.make_cobra_model(SCN.met_list, SCN.rxn_list)
 
-    # prepare dataframe to hold info from all rounds of pruning
-    all_data = pd.DataFrame({
-        'step' : list(),
-        'type' : list(),
-        'rxn_count' : list(),
-        'jaccard' : list()
-    })
-    # prune reps times and store all information in all_data
-    for i in range(int(reps)):
-        if (i+1) % 10 == 0:
-            print(f'On rep {i+1} of {reps}')
-        some_data = compare_nets(cobra_model, int(ins), int(outs))
-        # make another column to put i in so we can separate out all the different
-        # trajectories
-        some_data['trial'] = i+1
-        all_data = all_data.append(some_data)
-    # write all_data to a csv so we can tweak the plotting details without having
-    # to run this script again
-    all_data.to_csv('data/figure_S7_S8_data.csv', index = False)
+    # prune reps times and store all information as we go, a chunk at a time,
+    # instead of building up one big dataframe
+    with scn.ResultStore(
+        'data/figure_S7_S8_data.parquet', overwrite = True
+    ) as store:
+        for i in range(int(reps)):
+            if (i+1) % 10 == 0:
+                print(f'On rep {i+1} of {reps}')
+            some_data = compare_nets(cobra_model, int(ins), int(outs))
+            # make another column to put i in so we can separate out all the
+            # different trajectories
+            some_data['trial'] = i+1
+            store.extend(some_data)
+    # write everything to a csv so we can tweak the plotting details (in R)
+    # without having to run this script again
+    scn.results_to_csv(
+        'data/figure_S7_S8_data.parquet', 'data/figure_S7_S8_data.csv'
+    )
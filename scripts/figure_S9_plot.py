@@ -4,6 +4,7 @@ Make several UMAPs visualizing the results of figure_S9_data.py
 '''
 
 import pandas as pd
+import string_chem_net as scn
 import umap
 import numpy as np
 import matplotlib
@@ -14,13 +15,10 @@ def do_umap(filename):
     Given a filename with a bunch of reaction-inclusion vectors, use UMAP to
     get a two-dimensional representation of those networks
     '''
-    # get the reaction-inclusion vector out of the input file and make it into
-    # a bunch of 1/0 columns instead of one column of strings of 1s and 0s
-    data = pd.read_csv(filename)
-    # want each reaction bit in its own column and only pass those columns to umap
-    rxn_incl_cols = data['rxn_incl'].apply(lambda x: pd.Series(list(x)))
-    # first and last columns will be empty and all columns will be strings
-    umap_ready = rxn_incl_cols.iloc[:,1:-1].astype('int32')
+    # get the reaction-inclusion vectors out of the input file and make them
+    # into a matrix with a 1/0 column for every reaction to pass to umap
+    data = scn.read_sweep(filename)
+    umap_ready = scn.InclusionVector.stack(data['rxn_incl']).astype('int32')
     # do UMAP
     reducer = umap.UMAP()
     umap_results = reducer.fit_transform(umap_ready)
@@ -116,7 +114,7 @@ def growth_plot(figure, axes, data, label):
 
 # get UMAP results for networks with and without export reactions
 print('Doing UMAP')
-umap_results = do_umap('data/figure_S9_data.csv')
+umap_results = do_umap('data/figure_S9_data.parquet')
 
 print('Plotting UMAP results')
 # set up the three subplots
@@ -20,6 +20,7 @@ except ValueError:
 # create the universal network
 SCN = scn.CreateNetwork(monos, int(max_pol))
 cobra_model = scn.make_cobra_model(SCN.met_list, SCN.rxn_list)
+oracle = scn.FeasibilityOracle.from_network(SCN)
 
 # generate all of the environments
 envs = list()
@@ -55,23 +56,9 @@ while i < int(bm_count):
     # find an environment that supports growth with this environment so we can
     # prune
     bm_rxn = scn.choose_bm_mets(int(outs), universal_model)
-    scn.choose_inputs(int(ins), universal_model, bm_rxn)
     universal_model.objective = bm_rxn
-    solution = universal_model.optimize()
-    # can't just check solution.status because sometimes it's feasible but the
-    # flux through the biomass reaction is vanishingly small
-    bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-    while solution.status == 'infeasible' or bm_rxn_flux < 10e-10:
-        # if the solution isn't feasible, pick a different environment
-        in_rxns = [
-            # don't want to remove all boundary reactions because that would
-            # also remove all of the export reactions
-            rxn for rxn in universal_model.boundary if rxn.id.startswith('->')
-        ]
-        universal_model.remove_reactions(in_rxns)
-        scn.choose_inputs(int(ins), universal_model, bm_rxn)
-        solution = universal_model.optimize()
-        bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
+    # (the oracle rules out most bad choices without doing FBA)
+    scn.choose_viable_inputs(int(ins), universal_model, bm_rxn, oracle)
     # now that we know there's at least one environment that supports growth
     # with this biomass reaction, we can prune the universal network
     pruned_model = scn.min_flux_prune(universal_model, bm_rxn)
@@ -101,7 +88,7 @@ while i < int(bm_count):
         # prepare output
         growth = str(solution.fluxes.get(key = bm_rxn.id))
         env_string = ','.join([met.id for met in env])
-        growth_lists.append([bm_rxn.id, env_string, growth, bitstring])
+        growth_lists.append([bm_rxn.id, env_string, growth, str(bitstring)])
 
 # write output
 with open(f'data/min_env_test_{monos}_{max_pol}_{ins}ins_{outs}outs_' +
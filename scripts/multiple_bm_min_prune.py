@@ -8,14 +8,6 @@ import string_chem_net as scn
 import random
 import cobra
 
-# count number of 1s in a bitstring
-def count_bitstring(bitstring):
-    count = 0
-    for bit in [int(bit) for bit in list(bitstring)]:
-        if bit == 1:
-            count += 1
-    return(count)
-
 # get command-line arguments
 try:
     (monos, max_pol, ins, outs, bms) = sys.argv[1:]
@@ -65,8 +57,8 @@ with open(
     ) as out:
     out.write('bitstring\trxn_count\tbiomass\n')
     for network in pruned_nets.keys():
-        rxn_count = count_bitstring(network)
+        rxn_count = network.count()
         out_row = '\t'.join([
-            network, str(rxn_count), ','.join(pruned_nets[network])
+            str(network), str(rxn_count), ','.join(pruned_nets[network])
         ])
         out.write(out_row + '\n')
@@ -5,8 +5,6 @@
 
 import sys
 import string_chem_net as scn
-import pandas as pd
-import itertools as it
 
 # get command-line arguments
 try:
@@ -24,15 +22,18 @@ elif export == 'no':
 else:
     sys.exit('The last argument must be either "yes" or "no"')
 
-# create the universal network
-SCN = scn.CreateNetwork(monos, int(max_pol))
-untouched_model = scn.make_cobra_model(
-    SCN.met_list, 
-    SCN.rxn_list, 
-    allow_export = allow_export
+# create the universal network (or load it if it was already made)
+(SCN, untouched_model) = scn.load_network(
+    monos, int(max_pol), allow_export = allow_export
+)
+oracle = scn.FeasibilityOracle.from_network(SCN, allow_export = allow_export)
+# store information about the pruned networks as we go, a chunk at a time,
+# instead of building up one big dataframe
+store = scn.ResultStore(
+    f'data/multiple_env_fba_{monos}_{max_pol}_{ins}ins_{envs}envs_' +
+    f'{outs}outs_{orgs}orgs_{export}exp.parquet',
+    overwrite = True
 )
-# make a dataframe to store information about the pruned networks
-all_data = pd.DataFrame(columns = ['env', 'rxn_incl', 'biomass'])
 # loop over the different biomass reactions
 for bm in range(int(orgs)):
     print(f'On biomass reaction {bm}')
@@ -42,66 +43,31 @@ for bm in range(int(orgs)):
     # add a biomass reaction and set it as the objective
     bm_rxn = scn.choose_bm_mets(int(outs), model)
     model.objective = bm_rxn
-    # keep lists of the environments used and the reaction-inclusion vectors of
-    # the pruned networks
-    food_mets = list()
-    rxn_incl_vecs = list()
-    # use a while loop and not a for loop so we can go back on occasion
-    i = 0
-    # counter for how many times it had to reselct the environment to get a
-    # feasible solution with the full network
-    j = 0
-    while i < int(envs):
-        i +=  1 
-        # remove existing input reactions
-        in_rxns = [rxn for rxn in model.boundary if rxn.id.startswith('->')]
-        model.remove_reactions(in_rxns)
+    biomass = '-'.join([met.id for met in bm_rxn.metabolites])
+    # draws distinct environments that can make this biomass reaction
+    sampler = scn.EnvironmentSampler(
+        oracle, [met.id for met in bm_rxn.metabolites], int(ins)
+    )
+    for i in range(1, int(envs) + 1):
         # choose new input reactions
-        scn.choose_inputs(int(ins), model, bm_rxn)
-        in_rxns = [rxn for rxn in model.boundary if rxn.id.startswith('->')]
-        foods_string = ' '.join([
-            # getting the metabolite IDs out of a reaction is annoying
-            list(rxn.metabolites.keys())[0].id for rxn in in_rxns
-        ])
-        # see if this choice of metabolites can produce the biomass on this network
+        in_mets = scn.choose_viable_inputs(
+            int(ins), model, bm_rxn, sampler = sampler
+        )
+        if in_mets is None:
+            print(f'Only {i - 1} environments can make this biomass')
+            break
+        if i % 100 == 0:
+            print(f'On environment {i}')
         solution = model.optimize()
-        bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-        if solution.status == 'infeasible' or bm_rxn_flux < 1e-10:
-            # redo this iteration of the loop
-            i -= 1
-            # increment the counter of redos
-            j += 1 
-            continue
+        # remove all reactions without flux
+        no_flux_rxns = solution.fluxes[solution.fluxes == 0].index
+        flux_only = model.copy()
+        flux_only.remove_reactions(no_flux_rxns)
         # record these metabolites and the reactions that had flux
-        else:
-            if i % 100 == 0:
-                print(f'On environment {i}')
-            # reset the reselection counter
-            j = 0
-            # get the list of food source metabolites
-            food_mets.append('-'.join([
-                met.id 
-                for rxn in in_rxns 
-                for met in rxn.metabolites
-            ]))
-            # remove all reactions without flux
-            no_flux_rxns = solution.fluxes[solution.fluxes == 0].index
-            flux_only = model.copy()
-            flux_only.remove_reactions(no_flux_rxns)
-            rxn_incl = scn.make_rxn_incl(model, flux_only)
-            rxn_incl_vecs.append(rxn_incl)
-
-    # make a dataframe out of the two lists and add it to the larger dataframe
-    more_data = pd.DataFrame(list(zip(food_mets, rxn_incl_vecs)))
-    more_data.columns = ['env','rxn_incl']
-    # add a column with the biomass components
-    more_data['biomass'] = list(it.repeat(
-        '-'.join([met.id for met in bm_rxn.metabolites]),
-        len(food_mets)
-    ))
-    all_data = all_data.append(more_data)
+        store.append({
+            'env': '-'.join([met.id for met in in_mets]),
+            'rxn_incl': scn.make_rxn_incl(model, flux_only),
+            'biomass': biomass
+        })
 
-all_data.to_csv(
-    f'data/multiple_env_fba_{monos}_{max_pol}_{ins}ins_{envs}envs_' +
-    f'{outs}outs_{orgs}orgs_{export}exp.csv'
-)
+store.close()
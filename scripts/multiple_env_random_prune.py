@@ -8,14 +8,6 @@ import random
 import pandas as pd
 from scipy.stats import chisquare
 
-# count number of 1s in a bitstring
-def count_bitstring(bitstring):
-    count = 0
-    for bit in [int(bit) for bit in list(bitstring)]:
-        if bit == 1:
-            count += 1
-    return(count)
-
 # get command-line arguments
 try:
     (monos, max_pol, ins, envs, outs, reps) = sys.argv[1:]
@@ -93,9 +85,9 @@ while i < int(envs):
     bitstring_df = pd.DataFrame(list(map(list, random_pruned_dict.items())))
     bitstring_df.columns = ['bitstring', 'occurrences']
     # add in a column for the number of reactions in each network 
-    bitstring_df['rxn_count'] = list(map(
-        count_bitstring, bitstring_df.bitstring
-    ))
+    bitstring_df['rxn_count'] = [
+        bitstring.count() for bitstring in bitstring_df.bitstring
+    ]
     bitstring_df.to_csv(
         f'data/multiple_env_random_prune_{monos}_{max_pol}_{ins}ins_{outs}outs_{i}of{envs}.csv'
     )
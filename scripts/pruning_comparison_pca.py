@@ -4,6 +4,7 @@
 
 import sys
 import pandas as pd
+import string_chem_net as scn
 from sklearn.decomposition import PCA
 import matplotlib.pyplot as plt
 import matplotlib
@@ -11,12 +12,12 @@ import numpy as np
 
 # get reaction inclusion bitstrings
 filename = sys.argv[1]
-bitstring_df = pd.read_csv(filename) #, sep = '\t')
-# want each reaction bit in its own column and need to not have the rxn_count
-# column in the dataframe we pass to the PCA function
-bits_as_cols = bitstring_df['bitstring'].apply(lambda x: pd.Series(list(x)))
-# first and last columns will be empty and all columns will be strings
-pca_ready = bits_as_cols.iloc[:,1:-1].astype('int32')
+bitstring_df = pd.read_csv(filename, dtype = {'bitstring': str}) #, sep = '\t')
+# make the reaction-inclusion vectors (strings of 0s and 1s) into a matrix
+# with a 1/0 column for every reaction, leaving out the other columns
+pca_ready = scn.InclusionVector.stack(
+    bitstring_df['bitstring'].map(scn.InclusionVector.from_string)
+).astype('int32')
 
 # do PCA with scikit-learn
 pca = PCA(n_components = 2)
@@ -3,6 +3,7 @@
 
 import sys
 import pandas as pd
+import string_chem_net as scn
 import umap
 import numpy as np
 import matplotlib
@@ -10,11 +11,12 @@ from matplotlib import pyplot as plt
 
 # process file containing reaction inclusion bitstrings so we can do UMAP
 filename = sys.argv[1]
-bitstring_df = pd.read_csv(filename)
-# want each reaction bit in its own column and only pass those columns to umap
-bits_as_cols = bitstring_df['bitstring'].apply(lambda x: pd.Series(list(x)))
-# first and last columns will be empty and all columns will be strings
-umap_ready = bits_as_cols.iloc[:,1:-1].astype('int32')
+bitstring_df = pd.read_csv(filename, dtype = {'bitstring': str})
+# make the reaction-inclusion vectors (strings of 0s and 1s) into a matrix
+# with a 1/0 column for every reaction, leaving out the other columns
+umap_ready = scn.InclusionVector.stack(
+    bitstring_df['bitstring'].map(scn.InclusionVector.from_string)
+).astype('int32')
 
 # do UMAP
 reducer = umap.UMAP()
@@ -5,29 +5,55 @@
 # the environments are separated into environments you expect growth in and
 # environments you don't expect growth in to simulate what you might do with
 # real metabolic networks if you had growth data for a real organism
+# the pruned networks are saved as they're made, so running this again with
+# the same arguments (or more reps) only does the prunes that haven't been
+# done yet
 
 import sys
+import os
 import string_chem_net as scn
 import random
 import cobra
 
-# count number of 1s in a bitstring
-def count_bitstring(bitstring):
-    count = 0
-    for bit in [int(bit) for bit in list(bitstring)]:
-        if bit == 1:
-            count += 1
-    return(count)
-
 # get command-line arguments
 try:
-    (monos, max_pol, ins, yes_groups, no_groups, outs, reps) = sys.argv[1:]
+    (monos, max_pol, ins, yes_groups, no_groups, outs, reps) = sys.argv[1:8]
 except ValueError:
     sys.exit('Arguments:\nmonomers\nmax polymer length\nnumber of food ' +
         'sources in each environment\nnumber of environments to grow in\n' +
         'number of environments to not grow in\nnumber of biomass ' + 
-        'precursors\nnumber of times to prune the first network.'
+        'precursors\nnumber of times to prune the first network\n' +
+        'random seed (optional; by default a new one is chosen unless an ' +
+        'earlier run with the same arguments is being continued)'
     )
+seed = int(sys.argv[8]) if len(sys.argv) > 8 else None
+
+out_name = f'data/random_prune_env_tests_{monos}_{max_pol}_{yes_groups}yes_' + \
+    f'{no_groups}no_{ins}_{outs}outs'
+# the pruned networks go in a ResultStore, with a ledger of which reps are
+# done so that an earlier run with the same arguments can be continued
+os.makedirs(f'{out_name}_prunes.parquet', exist_ok = True)
+(ledger, resuming) = scn.resume_ledger(
+    f'{out_name}_prunes.parquet/ledger.jsonl',
+    {
+        'monos': monos, 'max_pol': int(max_pol), 'ins': int(ins),
+        'yes_groups': int(yes_groups), 'no_groups': int(no_groups),
+        'outs': int(outs), 'seed': seed,
+        # reps pruned by other versions may not be comparable with new ones
+        'version': scn.__version__
+    }
+)
+seed = ledger.config['seed']
+if resuming:
+    # prunes saved by a run that died before it could record them
+    for chunk in ledger.orphan_chunks(f'{out_name}_prunes.parquet'):
+        os.remove(chunk)
+store = scn.ResultStore(
+    f'{out_name}_prunes.parquet', None, overwrite = not resuming
+)
+# the biomass reaction and environments only depend on the seed, so they're
+# the same every time a run is continued
+random.seed(scn.derive_seed(seed, 'setup'))
 
 # create the reference network and pick a biomass reaction
 SCN = scn.CreateNetwork(monos, int(max_pol))
@@ -100,36 +126,64 @@ print(
     f'Pruning full {len(cobra_model.reactions)}-reaction network on first ' +
     'environment'
 )
-# will hold bitstrings of all unique reactions and the count of times each
-# one came up
-pruned_dict = dict()
-# will hold all the unique networks found by random_prune after reps runs
-pruned_nets = list()
-i = 0
-while i < int(reps):
-    i += 1
-    if i % 100 == 0:
-        print(f'Pruned {i} times')
+# sort the full network's reaction ids once for all of the
+# reaction-inclusion vectors
+rxn_index = scn.ReactionIndex(cobra_model)
+# reaction-inclusion vectors of the networks pruned by earlier runs (if there
+# were more reps then, only the first reps of them count)
+pruned = dict()
+for data in scn.iter_results(f'{out_name}_prunes.parquet'):
+    for (i, rxn_incl) in zip(data['rep'], data['rxn_incl']):
+        if i < int(reps):
+            pruned[int(i)] = rxn_incl
+# reps that are done but haven't been saved yet
+finished = list()
+for i in range(int(reps)):
+    if (i + 1) % 100 == 0:
+        print(f'Pruned {i + 1} times')
+    if (i,) in ledger:
+        continue
+    # every rep gets its own seed so that it's pruned the same way whenever
+    # it's done
+    random.seed(scn.derive_seed(seed, 'rep', i))
     pruned_net = scn.random_prune(cobra_model, bm_rxn)
     # in order to know whether we've seen this model before, we can't just 
     # compare models, since no two models are ever 'equal', so we'll compare
-    # reaction presence bitstrings. 
-    # we also want to keep track of how many times we see each model, so we 
-    # will make a dict with the bitstrings as keys
+    # reaction-inclusion vectors
     # remove the input reactions from this network so the next step (where we
     # change the input reactions) actually works
     in_rxns = [rxn for rxn in pruned_net.boundary if rxn.id.startswith('->')]
     pruned_net.remove_reactions(in_rxns)
-    bitstring = scn.make_bitstring(cobra_model, pruned_net)
-    if bitstring not in pruned_dict.keys():
-        # make sure all reaction lists are sorted so that all isomorphic
-        # networks have the same reaction list
-        pruned_dict[bitstring] = 1
+    pruned[i] = scn.make_rxn_incl(rxn_index, pruned_net)
+    store.append({'rep': i, 'rxn_incl': pruned[i]})
+    finished.append(((i,), 1))
+    # save every so often so a run that dies partway through doesn't lose
+    # everything
+    if len(finished) >= 100:
+        ledger.record(finished, store.flush())
+        finished = list()
+ledger.record(finished, store.flush())
+
+# will hold the reaction-inclusion vectors of all unique networks and the
+# count of times each one came up
+pruned_dict = dict()
+# will hold all the unique networks found by random_prune after reps runs
+pruned_nets = list()
+for i in range(int(reps)):
+    rxn_incl = pruned[i]
+    if rxn_incl not in pruned_dict.keys():
+        pruned_dict[rxn_incl] = 1
+        # remake the pruned network from the reactions in its vector
+        keep = set(rxn_index.rxn_ids[rxn_incl.to_array()])
+        pruned_net = cobra_model.copy()
+        pruned_net.remove_reactions([
+            rxn for rxn in pruned_net.reactions if rxn.id not in keep
+        ])
         pruned_nets.append(pruned_net)
     else:
         # if we already found this network once, then increment the
         # appropriate counter by 1
-        pruned_dict[bitstring] += 1
+        pruned_dict[rxn_incl] += 1
 
 print('Seeing which networks grow in the environments they should grow in.')
 # now that we have (approximately, if reps was large) all of the networks that
@@ -139,7 +193,7 @@ print('Seeing which networks grow in the environments they should grow in.')
 # of food groups as values
 usable_foods = dict()
 for network in pruned_nets:
-    bitstring = scn.make_bitstring(cobra_model, network)
+    bitstring = scn.make_rxn_incl(rxn_index, network)
     # we already determined that they all grow when given the first food group
     usable_foods[bitstring] = [[met.id for met in yes_envs[0]]]
 # start at the second group
@@ -163,16 +217,18 @@ for group in yes_envs[1:]:
             # drop the input reactions before making the bitstirng
             # since those will vary
             in_rxns = [
-                rxn for rxn in network.boundary if rxn.id.startwith('->')
+                rxn for rxn in network.boundary if rxn.id.startswith('->')
             ]
-            bitstring = scn.make_bitstring(cobra_model, network)
+            network.remove_reactions(in_rxns)
+            bitstring = scn.make_rxn_incl(rxn_index, network)
             usable_foods[bitstring].append([met.id for met in group])
         else:
             # even if this group wasn't viable, remove these input reactions
             # so the next group can be tested separately
             in_rxns = [
-                rxn for rxn in network.boundary if rxn.id.startwith('->')
+                rxn for rxn in network.boundary if rxn.id.startswith('->')
             ]
+            network.remove_reactions(in_rxns)
 
 print('Seeing which networks don\'t grow in the environments they shouldn\'t')
 # now see if each network doesn't grow on the food sources we don't want them
@@ -181,7 +237,7 @@ print('Seeing which networks don\'t grow in the environments they shouldn\'t')
 # as values
 unusable_foods = dict()
 for network in pruned_nets:
-    bitstring = scn.make_bitstring(cobra_model, network)
+    bitstring = scn.make_rxn_incl(rxn_index, network)
     # this time we don't know if any of the pruned networks won't grow on these
     # so we need to initialize with empty lists
     unusable_foods[bitstring] = list()
@@ -205,28 +261,25 @@ for group in no_envs:
             # drop the input reactions before making the bitstring since 
             # those will change from round to round
             in_rxns = [
-                rxn for rxn in network.boundary if rxn.id.startwith('->')
+                rxn for rxn in network.boundary if rxn.id.startswith('->')
             ]
             network.remove_reactions(in_rxns)
-            bitstring = scn.make_bitstring(cobra_model, network)
+            bitstring = scn.make_rxn_incl(rxn_index, network)
             unusable_foods[bitstring].append([met.id for met in group])
         else:
             # if we didn't add this to the list, drop the boundary reactions
             # so that they're not around for the next iteration
             in_rxns = [
-                rxn for rxn in network.boundary if rxn.id.startwith('->')
+                rxn for rxn in network.boundary if rxn.id.startswith('->')
             ]
             network.remove_reactions(in_rxns)
 
 # print a bunch of info but also write it out to a tsv
-with open(
-        f'data/random_prune_env_tests_{monos}_{max_pol}_{yes_groups}yes_' +
-        f'{no_groups}no_{ins}_{outs}outs.tsv', 'w'
-    ) as out:
+with open(f'{out_name}.tsv', 'w') as out:
     out.write('bitstring\trxn_count\toccurrences\tyes_count\tyes_envs\t' +
         'no_count\tno_envs\tbiomass\n')
     for network in usable_foods.keys():
-        rxn_count = count_bitstring(network)
+        rxn_count = network.count()
         print(
             f'A {rxn_count}-reaction network showed up ' +
             f'{pruned_dict[network]} times and could produce biomass in ' +
@@ -241,7 +294,7 @@ with open(
         for foods in unusable_foods[network]:
             print(','.join(foods))
         out_row = '\t'.join([
-            network, str(rxn_count), str(pruned_dict[network]),
+            str(network), str(rxn_count), str(pruned_dict[network]),
             str(len(usable_foods[network])), 
             ';'.join([','.join(foods) for foods in usable_foods[network]]),
             str(len(unusable_foods[network])),
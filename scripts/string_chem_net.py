@@ -6,14 +6,55 @@ create a network of all possible reactions.
 import itertools as it
 import numpy as np
 import random
+import math
+import bisect
+import multiprocessing as mp
+from multiprocessing import shared_memory
 import cobra
+import pandas as pd
 import re
-from cobra.flux_analysis import single_reaction_deletion as get_kos
+import os
+import atexit
+import tempfile
+import shutil
+import pickle
+import hashlib
+import json
+import time
+import functools
+import inspect
+from collections import namedtuple, OrderedDict
+from scipy import sparse
+from scipy.optimize import linprog
 import pygraphviz as gv
+# FluxNetwork can keep one HiGHS problem around and warm-start every solve
+# from the last one if highspy is installed, which is much faster than going
+# through scipy (which builds and solves a fresh problem every time)
+try:
+    import highspy
+except ImportError:
+    highspy = None
+# run_sweep resets GLPK's basis between tasks; swiglpk is installed with
+# COBRApy's default solver
+try:
+    import swiglpk
+except ImportError:
+    swiglpk = None
+# ResultStore writes results to Parquet files with pyarrow
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# bump this whenever a change would alter the networks or models this module
+# makes, since it's part of the key for cached networks
+__version__ = '1.3.1'
 
 class CreateNetwork():
     # given a set of monomers and a max polymer length, generate a network
-    def __init__(self, monos, max_len, no_mirrors = False, make_stoich = False):
+    def __init__(self, monos, max_len, no_mirrors = False, make_stoich = False,
+        engine = 'string', out_of_core = False):
         '''
         Given a set of monomers and a maximum polymer length, generate all
         possible string chemicals subject to those constraints as well as all
@@ -24,25 +65,131 @@ class CreateNetwork():
         increases runtime.
 
         If make_stoich is True, will save the stoichiometric matrix
-        corresponding to this network as a numpy array. Noticeably increases
-        memory required to run.
+        corresponding to this network as a sparse matrix. If out_of_core is
+        also True, the arrays behind that matrix are kept in a temporary file
+        instead of in memory.
+
+        engine decides how the network is generated. 'string' builds every
+        metabolite and reaction as a Python string up front. 'integer' encodes
+        each string chemical as a base-k integer (k = len(monos)) plus its
+        length and enumerates all fission reactions at once as rows of a numpy
+        array of metabolite indices (reactant, product 1, product 2); met_list
+        and rxn_list are then only built the first time something asks for
+        them, which makes generating very large networks much faster and keeps
+        memory use down.
+
+        Both engines put metabolites and reactions in the same canonical
+        order, which doesn't depend on hashing or anything else that can
+        change between runs or processes: metabolites by length and then
+        lexicographically (by the order of monos), and reactions by the index
+        of their reactant in met_list and then by where the reactant is cut
+        (i.e. the length of the first product). When splitting at two places
+        gives the same pair of products, only the first cut is kept. See
+        rxn_keys
         '''
-        self.met_list = self.make_met_list(monos, max_len, no_mirrors)
-        self.met_set = set(self.met_list)
-        self.rxn_list = self.make_rxn_list(self.met_list, no_mirrors)
+        self.monos = monos
+        self.max_len = max_len
+        self.no_mirrors = no_mirrors
+        self.engine = engine
+        self._met_list = None
+        self._met_set = None
+        self._rxn_list = None
+        self._rxn_array = None
+        if engine == 'string':
+            self.met_list = self.make_met_list(monos, max_len, no_mirrors)
+            self.rxn_list = self.make_rxn_list(self.met_list, no_mirrors)
+        elif engine == 'integer':
+            (self.met_lens, self.met_codes) = self.make_met_arrays(
+                monos, max_len, no_mirrors
+            )
+            self.rxn_array = self.make_rxn_array(max_len)
+        else:
+            raise ValueError(
+                f'engine must be either "string" or "integer", not "{engine}"'
+            )
         if make_stoich is True:
-            self.S = self.make_stoich_mat(self.rxn_list, self.met_list)
+            self.S = self.make_stoich_mat(
+                self.rxn_array, len(self.met_list), out_of_core
+            )
+
+    # the string versions of metabolites and reactions are attributes of
+    # string-engine networks but integer-engine networks only build them the
+    # first time they're needed
+    @property
+    def met_list(self):
+        if self._met_list is None:
+            self._met_list = self.met_ids(np.arange(len(self.met_codes)))
+        return(self._met_list)
+
+    @met_list.setter
+    def met_list(self, met_list):
+        self._met_list = met_list
+        self._met_set = None
+
+    @property
+    def met_set(self):
+        if self._met_set is None:
+            self._met_set = set(self.met_list)
+        return(self._met_set)
+
+    @property
+    def rxn_list(self):
+        if self._rxn_list is None:
+            self._rxn_list = self.rxn_ids(np.arange(len(self.rxn_array)))
+        return(self._rxn_list)
+
+    @rxn_list.setter
+    def rxn_list(self, rxn_list):
+        self._rxn_list = rxn_list
+
+    # likewise, string-engine networks only find the metabolite indices for
+    # each reaction the first time they're needed
+    @property
+    def rxn_array(self):
+        if self._rxn_array is None:
+            self._rxn_array = self.index_rxns(self.rxn_list, self.met_list)
+        return(self._rxn_array)
+
+    @rxn_array.setter
+    def rxn_array(self, rxn_array):
+        self._rxn_array = rxn_array
+
+    @classmethod
+    def from_arrays(cls, monos, max_len, no_mirrors, met_lens, met_codes,
+        rxn_array):
+        '''
+        Make an integer-engine network out of arrays that were already made by
+        another integer-engine network with the same parameters (e.g. arrays
+        loaded from the network cache) without generating anything
+        '''
+        network = cls.__new__(cls)
+        network.monos = monos
+        network.max_len = max_len
+        network.no_mirrors = no_mirrors
+        network.engine = 'integer'
+        network._met_list = None
+        network._met_set = None
+        network._rxn_list = None
+        network.met_lens = met_lens
+        network.met_codes = met_codes
+        network.rxn_array = rxn_array
+        # find_mets (and so make_rxn_array) still needs these
+        network.make_code_index(met_lens, met_codes)
+        return(network)
 
     def remove_mirrors(self, with_mirrors):
         '''
         Given a list of metabolites that contains mirror-image duplicates, 
         identify all such duplicates and remove them.
-        E.g. if the list includes both 'aab' and 'baa', only keep one
+        E.g. if the list includes both 'aab' and 'baa', only keep one (the one
+        that comes first in with_mirrors). Keeps the order of with_mirrors
         '''
-        no_mirrors = set()
+        no_mirrors = list()
+        seen = set()
         for item in with_mirrors:
-            if item[::-1] not in no_mirrors:
-                no_mirrors.add(item)
+            if item[::-1] not in seen:
+                no_mirrors.append(item)
+                seen.add(item)
         return(no_mirrors)
 
     def make_met_list(self, monos, max_len, no_mirrors):
@@ -72,8 +219,10 @@ class CreateNetwork():
     def make_rxns1(self, met):
         '''
         Given a metabolite, find all pairs of smaller metabolites that can be
-        generated by splitting the given metabolite into two pieces
+        generated by splitting the given metabolite into two pieces, in order
+        of where it's split
         '''
+        rxn_list = list()
         rxn_set = set()
         if len(met) > 1:
             for i in range(1, len(met)):
@@ -86,16 +235,18 @@ class CreateNetwork():
                 if rev_rxn in rxn_set:
                     pass
                 else:
+                    rxn_list.append(rxn)
                     rxn_set.add(rxn)
-        rxn_list = list(rxn_set)
         return(rxn_list)
 
     def make_rxns2(self, met):
         '''
         Given a metabolite, find all pairs of smaller metabolites that can be
         geerated by splitting the given metabolite into two pieces and ensure
-        that the two pieces are not mirror images of each other
+        that the two pieces are not mirror images of each other, in order of
+        where it's split
         '''
+        rxn_list = list()
         rxn_set = set()
         if len(met) > 1:
             for i in range(1, len(met)):
@@ -115,8 +266,8 @@ class CreateNetwork():
                 if rev_rxn in rxn_set:
                     pass
                 else:
+                    rxn_list.append(rxn)
                     rxn_set.add(rxn)
-        rxn_list = list(rxn_set)
         return(rxn_list)
 
     # find all decomposition reactions for all metabolites
@@ -142,40 +293,272 @@ class CreateNetwork():
             ]
         return(rxn_list)
 
-    def make_stoich_mat(self, rxn_list, met_list):
+    def index_rxns(self, rxn_list, met_list):
+        '''
+        Given lists of reactions and metabolites, make a numpy array with one
+        row of metabolite indices (reactant, product 1, product 2) for every
+        reaction, looking each metabolite up in a dictionary instead of
+        searching met_list for it
+        '''
+        met_index = {met: i for (i, met) in enumerate(met_list)}
+        rxn_array = np.array([
+            [met_index[met] for met in rxn.replace('->', '+').split('+')]
+            for rxn in rxn_list
+        ], dtype = np.int64)
+        return(rxn_array.reshape(-1, 3))
+
+    def make_stoich_mat(self, rxn_array, met_count, out_of_core = False):
         '''
-        Given a list of reactions, make a stoichiometric matrix with one column
-        for each metabolite and one row for each reaction and appropriate
+        Given an array of metabolite indices for every reaction (as made by
+        make_rxn_array or index_rxns), make a sparse (CSR) stoichiometric matrix
+        with one column for each metabolite, one row for each reaction and int8
         stoichiometric coefficients in the cells
-        Can take a long time and a lot of memory to create for networks larger
-        than ~20,000 reactions. Because of this potentially high memory
-        requirement, saves the matrix as a numpy memory map
-        '''
-        # since these can get very large, we need to use a memory-mapped object
-        #print(f'Dimensions of matrix: {len(rxn_list)}, {len(met_list)}')
-        S = np.memmap('stoich_mat.dat', dtype = np.float32, mode = 'w+',
-            shape = (len(rxn_list), len(met_list)))
-        # fill the array with 0s
-        for i in range(0, len(met_list)):
-            S[:,i] = np.zeros(len(rxn_list))
-        # for each reaction, change all the appropriate zeros to actual numbers
-        for i in range(0, len(rxn_list)):
-            # technically we don't need to make all these variables but giving
-            # things names makes this significantly more legible imo
-            ref_rxn = rxn_list[i]
-            bits = ref_rxn.split('->')
-            reacs = bits[0].split('+')
-            prods = bits[1].split('+')
-            # find the indices for each of these substances in met_list so we
-            # edit the appropriate column in S
-            for met in reacs:
-                S[i,met_list.index(met)] = -1
-            for met in prods:
-                # add 1 instead of assigning 1 in case two products are
-                # the same, e.g. 'adad -> ad + ad'
-                S[i,met_list.index(met)] += 1.0
+        If out_of_core is True, the arrays behind the matrix are written to a
+        temporary file that is unique to this process (and removed when it
+        exits) and memory-mapped back in, so very large matrices don't need to
+        fit in memory
+        '''
+        rxn_count = len(rxn_array)
+        # every reaction consumes one reactant and produces two products; coo
+        # matrices add up duplicate entries when converted to csr, which takes
+        # care of reactions with two identical products, e.g. 'adad -> ad + ad'
+        rows = np.repeat(np.arange(rxn_count), 3)
+        coefs = np.tile(np.array([-1, 1, 1], dtype = np.int8), rxn_count)
+        S = sparse.coo_matrix(
+            (coefs, (rows, rxn_array.ravel())),
+            shape = (rxn_count, met_count)
+        ).tocsr()
+        if out_of_core is True:
+            # use 32-bit indices whenever possible, since scipy would otherwise
+            # convert them (and pull them into memory) when making the matrix
+            if max(S.nnz, met_count) < 2**31:
+                idx_type = np.int32
+            else:
+                idx_type = np.int64
+            (handle, path) = tempfile.mkstemp(prefix = 'stoich_mat_')
+            os.close(handle)
+            atexit.register(remove_file, path)
+            arrays = [
+                S.indptr.astype(idx_type),
+                S.indices.astype(idx_type),
+                S.data
+            ]
+            with open(path, 'wb') as out:
+                for array in arrays:
+                    array.tofile(out)
+            # now read each of the three arrays back in as memory maps
+            offset = 0
+            mapped = list()
+            for array in arrays:
+                mapped.append(np.memmap(
+                    path, dtype = array.dtype, mode = 'r', offset = offset,
+                    shape = array.shape
+                ))
+                offset += array.nbytes
+            S = sparse.csr_matrix(
+                (mapped[2], mapped[1], mapped[0]),
+                shape = (rxn_count, met_count),
+                copy = False
+            )
         return(S)
 
+    def make_met_arrays(self, monos, max_len, no_mirrors):
+        '''
+        Given a list of monomers and a maximum polymer length, make two numpy
+        arrays with the length and the base-k code of every possible string
+        chemical satisfying those constraints. The i-th digit of a code is the
+        position in monos of the i-th character of the string, so metabolites
+        end up in the same order as make_met_list puts them in
+        '''
+        k = len(monos)
+        met_lens = list()
+        met_codes = list()
+        for length in range(1, max_len + 1):
+            codes = np.arange(k**length, dtype = np.int64)
+            if no_mirrors is True:
+                # of each pair of mirror images, keep the one that comes first
+                # in lexicographic order (i.e. has the smaller code), which is
+                # also the one remove_mirrors keeps
+                codes = codes[codes <= self.reverse_codes(codes, length)]
+            met_lens.append(np.full(len(codes), length, dtype = np.int8))
+            met_codes.append(codes)
+        met_lens = np.concatenate(met_lens)
+        met_codes = np.concatenate(met_codes)
+        self.make_code_index(met_lens, met_codes)
+        return(met_lens, met_codes)
+
+    def make_code_index(self, met_lens, met_codes):
+        '''
+        Set up what find_mets needs to find the index of a metabolite from its
+        length and code, given the arrays from make_met_arrays: offsets, the
+        position the first string of each length would have in an array of
+        every possible string of every length, and (if mirror images were
+        removed) code_index, a lookup table from those positions to indices
+        '''
+        k = len(self.monos)
+        self.offsets = np.zeros(self.max_len + 2, dtype = np.int64)
+        for length in range(1, self.max_len + 1):
+            self.offsets[length + 1] = self.offsets[length] + k**length
+        # with mirror images removed, a metabolite's index isn't just its
+        # position in that array, so we need a lookup table
+        if self.no_mirrors is True:
+            self.code_index = np.full(
+                self.offsets[self.max_len + 1], -1, dtype = np.int64
+            )
+            self.code_index[self.offsets[met_lens] + met_codes] = np.arange(
+                len(met_codes)
+            )
+
+    def reverse_codes(self, codes, length):
+        '''
+        Given an array of codes for string chemicals of the same length, find
+        the codes of their mirror images
+        '''
+        k = len(self.monos)
+        rev_codes = np.zeros_like(codes)
+        remainder = codes.copy()
+        for i in range(length):
+            rev_codes = rev_codes * k + remainder % k
+            remainder //= k
+        return(rev_codes)
+
+    def find_mets(self, length, codes):
+        '''
+        Given an array of codes for string chemicals of the same length, find
+        the indices of those metabolites in met_list (or of their mirror images
+        if those are the ones that were kept)
+        '''
+        if self.no_mirrors is True:
+            codes = np.minimum(codes, self.reverse_codes(codes, length))
+            return(self.code_index[self.offsets[length] + codes])
+        return(self.offsets[length] + codes)
+
+    def make_rxn_array(self, max_len):
+        '''
+        Find all ways to split each metabolite into two smaller metabolites
+        using the integer encoding of each metabolite and return a numpy array
+        with one row of metabolite indices (reactant, product 1, product 2) for
+        every reaction. The rows are in the canonical reaction order (by
+        reactant index, then by cut position, keeping only the first of two
+        cuts that give the same products; see rxn_keys), which make_rxn_list
+        also uses, so row i is the ith reaction make_rxn_list gives for the
+        same metabolites
+        '''
+        k = len(self.monos)
+        rxn_blocks = list()
+        for length in range(2, max_len + 1):
+            reacs = np.flatnonzero(self.met_lens == length)
+            codes = self.met_codes[reacs]
+            # one row for each reactant and one column for each place the
+            # reactant could be split
+            prods1 = np.empty((len(reacs), length - 1), dtype = np.int64)
+            prods2 = np.empty((len(reacs), length - 1), dtype = np.int64)
+            for cut in range(1, length):
+                prods1[:,cut-1] = self.find_mets(cut, codes // k**(length-cut))
+                prods2[:,cut-1] = self.find_mets(
+                    length - cut, codes % k**(length-cut)
+                )
+            # make sure the same reaction with products in the opposite order
+            # isn't already in the reactions list; that can only happen when
+            # cutting at length - cut gave the same two products
+            keep = np.ones(prods1.shape, dtype = bool)
+            for cut in range(length // 2 + 1, length):
+                other = length - cut
+                keep[:,cut-1] = ~(
+                    (prods1[:,other-1] == prods2[:,cut-1]) &
+                    (prods2[:,other-1] == prods1[:,cut-1])
+                )
+            reacs = np.broadcast_to(reacs[:,None], prods1.shape)
+            rxn_blocks.append(
+                np.stack([reacs[keep], prods1[keep], prods2[keep]], axis = 1)
+            )
+        if len(rxn_blocks) == 0:
+            return(np.empty((0, 3), dtype = np.int64))
+        return(np.concatenate(rxn_blocks))
+
+    def rxn_keys(self):
+        '''
+        Make an array with the key every reaction is sorted by: the index of
+        its reactant times max_len plus the position of the cut (the length of
+        its first product). Each key only takes a couple of lookups to work
+        out, the keys are strictly increasing along rxn_array and rxn_list,
+        and two networks with the same parameters always give the same keys,
+        so the position of any reaction can be found with np.searchsorted
+        '''
+        rxn_array = np.asarray(self.rxn_array)
+        if self.engine == 'integer':
+            cuts = self.met_lens[rxn_array[:,1]].astype(np.int64)
+        else:
+            met_lens = np.array([len(met) for met in self.met_list])
+            cuts = met_lens[rxn_array[:,1]]
+        return(rxn_array[:,0] * self.max_len + cuts)
+
+    def met_ids(self, indices):
+        '''
+        Given an array of indices of metabolites in an integer-engine network,
+        make a list of the strings those metabolites correspond to
+        '''
+        k = len(self.monos)
+        indices = np.asarray(indices)
+        lens = self.met_lens[indices]
+        codes = self.met_codes[indices]
+        chars = np.array(list(self.monos))
+        ids = np.empty(len(indices), dtype = object)
+        for length in np.unique(lens):
+            is_len = lens == length
+            # get every digit of every code then swap digits for characters
+            # and glue each row of characters into a single string
+            digits = (
+                codes[is_len,None] // k**np.arange(length - 1, -1, -1)
+            ) % k
+            ids[is_len] = chars[digits].view(f'<U{length}').ravel().tolist()
+        return(ids.tolist())
+
+    def rxn_ids(self, indices):
+        '''
+        Given an array of indices of reactions in rxn_array, make a list of the
+        strings those reactions correspond to in rxn_list
+        '''
+        met_list = self.met_list
+        return([
+            f'{met_list[reac]}->{met_list[prod1]}+{met_list[prod2]}'
+            for (reac, prod1, prod2) in self.rxn_array[indices].tolist()
+        ])
+
+    def count_monomers(self):
+        '''
+        Make an array with one row per metabolite (in the same order as
+        met_list) and one column per monomer (in the same order as monos)
+        with the number of times each monomer appears in each metabolite
+        '''
+        k = len(self.monos)
+        if self.engine == 'string':
+            return(np.array(
+                [[met.count(mono) for mono in self.monos]
+                for met in self.met_list],
+                dtype = np.int16
+            ).reshape(-1, k))
+        counts = np.zeros((len(self.met_codes), k), dtype = np.int16)
+        codes = self.met_codes.copy()
+        for i in range(self.max_len):
+            # the last digit of every code that's still part of its string
+            # (shorter strings just have leading zeros from here on)
+            digits = np.where(self.met_lens > i, codes % k, -1)
+            for j in range(k):
+                counts[:,j] += digits == j
+            codes //= k
+        return(counts)
+
+def remove_file(path):
+    '''
+    Delete a file if it still exists (used to clean up temporary files when
+    the process that made them exits)
+    '''
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 def make_edgelist(rxn_list, rxns_as_nodes = True):
     '''
     Given a list of reactions, make a list of edges in the corresponding
@@ -237,55 +620,921 @@ def make_cobra_model(met_list, rxn_list, allow_export = True):
     If allow_export is True, an extra reaction will be added for every
     metabolite that consumes the metabolite and produces nothing to simulate
     secretion of waste products
+    Every metabolite and reaction object is made first and they're all added
+    to the model in one batch, since every separate call to add_reaction
+    has to update the solver problem
     '''
     model = cobra.Model('string_chem')
     # start with the metabolites
     # we will need to make a dictionary with the COBRA metabolite objects
     # as keys and stoichiometric coefficients as values, so we'll need a way
-    # to look up the COBRA metabolite objects using their names, since
-    cobra_mets = [cobra.Metabolite(met, compartment = 'c') for met in met_list]
-    met_dict = dict()
-    for met in met_list:
-        met_dict[met] = cobra.Metabolite(met, compartment = 'c')
-    
-    # start working on the reactions
-    # start by making a dictionary to look up species involved in a reaction
-    # using the string notation of that reaction
-    rxn_dict = dict()
-    for rxn in rxn_list:
-        rxn_dict[rxn] = re.split('(\+|\-\>)', rxn)[0::2]
+    # to look up the COBRA metabolite objects using their names
+    met_dict = {met: cobra.Metabolite(met, compartment = 'c') for met in met_list}
 
-    # start by just making the COBRA reaction objects then add metabolites
-    cobra_rxns = [
+    # now make the COBRA reaction objects and give them their metabolites
+    cobra_rxns = list()
+    for rxn in rxn_list:
+        # we know the first metabolite in the reaction is the reactant
+        (reac, prod1, prod2) = rxn.replace('->', '+').split('+')
         # make all reactions reversible by default
-        cobra.Reaction(rxn, upper_bound = 1000.0, lower_bound = -1000.0)
-        for rxn in rxn_list
-    ]
-    for rxn in cobra_rxns:
-        # find all the COBRA metabolites associated with this reaction
-        c_mets = [met_dict[met] for met in rxn_dict[rxn.id]]
-        # we know the first metabolite in the list is the reactant
-        rxn.add_metabolites({c_mets[0] : -1.0})
+        cobra_rxn = cobra.Reaction(
+            rxn, upper_bound = 1000.0, lower_bound = -1000.0
+        )
         # check if reactant splits into two identical products
-        if rxn_dict[rxn.id][1] == rxn_dict[rxn.id][2]:
-            rxn.add_metabolites({c_mets[1] : 2.0})
+        if prod1 == prod2:
+            cobra_rxn.add_metabolites(
+                {met_dict[reac] : -1.0, met_dict[prod1] : 2.0}
+            )
         else:
-            rxn.add_metabolites({c_mets[1] : 1.0, c_mets[2] : 1.0})
-        # now that the reaction is complete, we can just add it to the model
-        model.add_reaction(rxn)
+            cobra_rxn.add_metabolites({
+                met_dict[reac] : -1.0,
+                met_dict[prod1] : 1.0,
+                met_dict[prod2] : 1.0
+            })
+        cobra_rxns.append(cobra_rxn)
 
     # add in export reactions for all metabolites if specified
     if allow_export is True:
-        for met in cobra_mets:
+        for met in met_dict.values():
             out_rxn = cobra.Reaction(
                 met.id + '->',
                 upper_bound = 1000.0, # only allow exporting
                 lower_bound = 0.0
             )
             out_rxn.add_metabolites({met: -1.0})
-            model.add_reaction(out_rxn)
+            cobra_rxns.append(out_rxn)
+
+    # now add everything to the model at once
+    model.add_metabolites(list(met_dict.values()))
+    model.add_reactions(cobra_rxns)
     return(model)
 
+def load_network(monos, max_len, no_mirrors = False, allow_export = True,
+    cache_dir = os.path.join('data', 'network_cache')):
+    '''
+    Get the universal network with the given parameters and a COBRApy model of
+    it, as made by CreateNetwork (with the integer engine) and
+    make_cobra_model. The first time a set of parameters is used, the
+    metabolite and reaction arrays and the model are saved in a subdirectory
+    of cache_dir; after that they're loaded from there (the arrays as memory
+    maps) instead of being made again
+    The cache is keyed on the parameters and the version of this module, so
+    changing either makes a new entry
+    '''
+    key = repr((monos, max_len, no_mirrors, allow_export, __version__))
+    entry = os.path.join(
+        cache_dir,
+        f'{len(monos)}_{max_len}_' + hashlib.sha1(key.encode()).hexdigest()
+    )
+    if not os.path.isdir(entry):
+        SCN = CreateNetwork(monos, max_len, no_mirrors, engine = 'integer')
+        model = make_cobra_model(SCN.met_list, SCN.rxn_list, allow_export)
+        # write everything to a temporary directory and then rename it so
+        # that other processes never see a half-written entry
+        os.makedirs(cache_dir, exist_ok = True)
+        temp_dir = tempfile.mkdtemp(dir = cache_dir)
+        np.save(os.path.join(temp_dir, 'met_lens.npy'), SCN.met_lens)
+        np.save(os.path.join(temp_dir, 'met_codes.npy'), SCN.met_codes)
+        np.save(os.path.join(temp_dir, 'rxn_array.npy'), SCN.rxn_array)
+        with open(os.path.join(temp_dir, 'model.pkl'), 'wb') as out:
+            pickle.dump(model, out, protocol = pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(temp_dir, 'key.txt'), 'w') as out:
+            out.write(key + '\n')
+        try:
+            os.rename(temp_dir, entry)
+        except OSError:
+            # another process finished making this entry first
+            shutil.rmtree(temp_dir, ignore_errors = True)
+        return(SCN, model)
+    SCN = CreateNetwork.from_arrays(
+        monos, max_len, no_mirrors,
+        np.load(os.path.join(entry, 'met_lens.npy'), mmap_mode = 'r'),
+        np.load(os.path.join(entry, 'met_codes.npy'), mmap_mode = 'r'),
+        np.load(os.path.join(entry, 'rxn_array.npy'), mmap_mode = 'r')
+    )
+    with open(os.path.join(entry, 'model.pkl'), 'rb') as model_file:
+        model = pickle.load(model_file)
+    return(SCN, model)
+
+# what FluxNetwork.optimize returns: the solver status ('optimal',
+# 'infeasible', etc.), the value of the objective and a numpy array with the
+# flux through every reaction in the network
+FluxSolution = namedtuple(
+    'FluxSolution', ['status', 'objective_value', 'fluxes']
+)
+
+class FluxNetwork():
+    # a lightweight alternative to a COBRApy model for doing FBA over and over
+    def __init__(self, S, lower_bounds, upper_bounds, rxn_ids, met_ids,
+        objective = None, solver = None):
+        '''
+        Hold a metabolic network as a sparse stoichiometric matrix (one row
+        per metabolite and one column per reaction) plus vectors of reaction
+        bounds, and do FBA on it with the HiGHS solver, which avoids all of the
+        bookkeeping COBRApy and optlang do every time a model is optimized or
+        changed.
+
+        solver is either 'scipy', which solves every LP from scratch with
+        scipy.optimize.linprog, or 'highspy', which keeps a single HiGHS
+        problem around, only changes the bounds and objective that changed
+        since the last solve and warm-starts from the last solution. Defaults
+        to 'highspy' if it's installed and 'scipy' if it isn't.
+
+        Every reaction in the network is either present or not; knocking a
+        reaction out just marks it as absent (i.e. sets its bounds to 0) and
+        restoring it brings its original bounds back, so the network never
+        has to be rebuilt.
+
+        rxn_ids and met_ids are lists of names for the columns and rows of S,
+        and objective is the index (or id) of the reaction to maximize.
+        Usually easier to make with from_cobra or from_network.
+        '''
+        self.S = sparse.csc_matrix(S, dtype = np.float64)
+        self.lower_bounds = np.asarray(lower_bounds, dtype = np.float64)
+        self.upper_bounds = np.asarray(upper_bounds, dtype = np.float64)
+        self.present = np.ones(self.S.shape[1], dtype = bool)
+        self.rxn_ids = list(rxn_ids)
+        self.met_ids = list(met_ids)
+        self.rxn_index = {rxn: i for (i, rxn) in enumerate(self.rxn_ids)}
+        self.met_index = {met: i for (i, met) in enumerate(self.met_ids)}
+        # reactions with a single metabolite, i.e. what COBRApy would call
+        # boundary reactions
+        self.boundary = np.diff(self.S.indptr) == 1
+        # input reactions, keyed by the index of the metabolite they make
+        self.inputs = {
+            self.S.indices[self.S.indptr[i]]: i
+            for (i, rxn) in enumerate(self.rxn_ids) if rxn.startswith('->')
+        }
+        self.objective = None
+        self.maximize = True
+        if objective is not None:
+            self.set_objective(objective)
+        if solver is None:
+            solver = 'scipy' if highspy is None else 'highspy'
+        elif solver not in ['scipy', 'highspy']:
+            raise ValueError(
+                f'solver must be either "scipy" or "highspy", not "{solver}"'
+            )
+        self.solver = solver
+        # the persistent HiGHS problem isn't made until the first solve; the
+        # bounds and costs last passed to it are kept in highs_cols
+        self.highs = None
+        self.highs_cols = None
+        # remove_loops keeps its own HiGHS problem the same way
+        self.loop_highs = None
+        self.loop_highs_cols = None
+
+    def __getstate__(self):
+        # HiGHS problems can't be pickled, so send networks to other processes
+        # without theirs and let them make a new one when they need it
+        state = self.__dict__.copy()
+        state['highs'] = None
+        state['highs_cols'] = None
+        state['loop_highs'] = None
+        state['loop_highs_cols'] = None
+        return(state)
+
+    @classmethod
+    def from_cobra(cls, model, solver = None):
+        '''
+        Make a FluxNetwork with the same reactions, metabolites, bounds and
+        objective as a COBRApy model
+        '''
+        met_index = {met.id: i for (i, met) in enumerate(model.metabolites)}
+        rows = list()
+        cols = list()
+        coefs = list()
+        for (i, rxn) in enumerate(model.reactions):
+            for (met, coef) in rxn.metabolites.items():
+                rows.append(met_index[met.id])
+                cols.append(i)
+                coefs.append(coef)
+        S = sparse.coo_matrix(
+            (coefs, (rows, cols)),
+            shape = (len(model.metabolites), len(model.reactions))
+        )
+        objective = [
+            i for (i, rxn) in enumerate(model.reactions)
+            if rxn.objective_coefficient != 0
+        ]
+        return(cls(
+            S,
+            [rxn.lower_bound for rxn in model.reactions],
+            [rxn.upper_bound for rxn in model.reactions],
+            [rxn.id for rxn in model.reactions],
+            [met.id for met in model.metabolites],
+            objective[0] if len(objective) > 0 else None,
+            solver
+        ))
+
+    @classmethod
+    def from_network(cls, SCN, allow_export = True, solver = None):
+        '''
+        Make a FluxNetwork straight from a CreateNetwork object, with the same
+        reactions (in the same order) and bounds make_cobra_model would give
+        the equivalent COBRApy model
+        '''
+        rxn_count = len(SCN.rxn_array)
+        met_count = len(SCN.met_list)
+        # transpose of the stoichiometric matrix CreateNetwork makes, since
+        # the solver wants one row per metabolite
+        S = SCN.make_stoich_mat(SCN.rxn_array, met_count).T
+        lower_bounds = np.full(rxn_count, -1000.0)
+        upper_bounds = np.full(rxn_count, 1000.0)
+        rxn_ids = SCN.rxn_list
+        if allow_export is True:
+            S = sparse.hstack([S, -sparse.identity(met_count, dtype = np.int8)])
+            lower_bounds = np.concatenate([lower_bounds, np.zeros(met_count)])
+            upper_bounds = np.concatenate(
+                [upper_bounds, np.full(met_count, 1000.0)]
+            )
+            rxn_ids = rxn_ids + [met + '->' for met in SCN.met_list]
+        return(cls(
+            S, lower_bounds, upper_bounds, rxn_ids, SCN.met_list,
+            solver = solver
+        ))
+
+    def copy(self):
+        '''
+        Make a copy of this network that can have different reactions present
+        and a different objective; the stoichiometric matrix is shared until
+        either network gets a new reaction
+        '''
+        new_net = FluxNetwork.__new__(FluxNetwork)
+        new_net.__dict__.update(self.__dict__)
+        new_net.present = self.present.copy()
+        new_net.rxn_ids = list(self.rxn_ids)
+        new_net.rxn_index = dict(self.rxn_index)
+        new_net.inputs = dict(self.inputs)
+        new_net.highs = None
+        new_net.highs_cols = None
+        new_net.loop_highs = None
+        new_net.loop_highs_cols = None
+        return(new_net)
+
+    def find_rxns(self, rxns):
+        '''
+        Given a reaction id, reaction index, or list or array of either, return
+        a numpy array of reaction indices
+        '''
+        if isinstance(rxns, (str, int, np.integer)):
+            rxns = [rxns]
+        return(np.array([
+            self.rxn_index[rxn] if isinstance(rxn, str) else rxn
+            for rxn in rxns
+        ], dtype = np.int64))
+
+    def add_reaction(self, rxn_id, stoich, lower_bound = 0.0,
+        upper_bound = 1000.0):
+        '''
+        Add a reaction to the network given its id and a dictionary with
+        metabolite ids (or indices) as keys and stoichiometric coefficients as
+        values, and return the index of the new reaction
+        '''
+        column = np.zeros((self.S.shape[0], 1))
+        for (met, coef) in stoich.items():
+            if isinstance(met, str):
+                met = self.met_index[met]
+            column[met] += coef
+        self.S = sparse.hstack([self.S, sparse.csc_matrix(column)]).tocsc()
+        self.lower_bounds = np.append(self.lower_bounds, lower_bound)
+        self.upper_bounds = np.append(self.upper_bounds, upper_bound)
+        self.present = np.append(self.present, True)
+        self.boundary = np.append(self.boundary, len(stoich) == 1)
+        self.rxn_index[rxn_id] = len(self.rxn_ids)
+        self.rxn_ids.append(rxn_id)
+        return(len(self.rxn_ids) - 1)
+
+    def set_objective(self, rxn, maximize = True):
+        '''
+        Make the given reaction (id or index) the one FBA maximizes (or
+        minimizes, if maximize is False)
+        '''
+        self.objective = int(self.find_rxns(rxn)[0])
+        self.maximize = maximize
+
+    def set_inputs(self, met_ids, upper_bound = 100.0):
+        '''
+        Make the given metabolites the only ones the network can take up (with
+        the same kind of input reaction choose_inputs makes) and return the
+        indices of their input reactions
+        Input reactions are never actually deleted, just knocked out, so
+        switching back to an earlier set of inputs doesn't grow the network
+        '''
+        self.knock_out(list(self.inputs.values()))
+        in_rxns = list()
+        for met in met_ids:
+            if isinstance(met, str):
+                met = self.met_index[met]
+            if met not in self.inputs:
+                self.inputs[met] = self.add_reaction(
+                    '->' + self.met_ids[met], {met: 1.0}, 0.0, upper_bound
+                )
+            in_rxns.append(self.inputs[met])
+        self.restore(in_rxns)
+        return(np.array(in_rxns, dtype = np.int64))
+
+    def knock_out(self, rxns):
+        '''
+        Remove the given reactions (ids or indices) from the network by
+        setting their bounds to 0
+        '''
+        self.present[self.find_rxns(rxns)] = False
+
+    def restore(self, rxns):
+        '''
+        Put the given reactions (ids or indices) back into the network with
+        their original bounds
+        '''
+        self.present[self.find_rxns(rxns)] = True
+
+    def optimize(self):
+        '''
+        Do FBA on the reactions currently present in the network and return a
+        FluxSolution; fluxes of absent reactions are always 0
+        '''
+        if self.solver == 'highspy':
+            return(self.optimize_highspy())
+        return(self.optimize_scipy())
+
+    def optimize_scipy(self):
+        '''
+        Do FBA by building a new LP out of the reactions currently present and
+        solving it with scipy.optimize.linprog
+        '''
+        cols = np.flatnonzero(self.present)
+        # linprog minimizes, so minimize the negative of the objective flux
+        # if we want to maximize it
+        sign = -1.0 if self.maximize else 1.0
+        obj_coefs = np.zeros(len(cols))
+        obj_coefs[cols == self.objective] = sign
+        result = linprog(
+            obj_coefs,
+            A_eq = self.S[:,cols],
+            b_eq = np.zeros(self.S.shape[0]),
+            bounds = np.column_stack(
+                [self.lower_bounds[cols], self.upper_bounds[cols]]
+            ),
+            method = 'highs'
+        )
+        fluxes = np.zeros(len(self.rxn_ids))
+        if result.status == 0:
+            fluxes[cols] = result.x
+            return(FluxSolution('optimal', sign * result.fun, fluxes))
+        status = {2: 'infeasible', 3: 'unbounded'}.get(result.status, 'failed')
+        return(FluxSolution(status, np.nan, fluxes))
+
+    def optimize_highspy(self):
+        '''
+        Do FBA with a persistent HiGHS problem that has a column for every
+        reaction in the network. Only the bounds and objective coefficients
+        that changed since the last solve are updated, so HiGHS can start from
+        the last optimal basis
+        '''
+        col_count = len(self.rxn_ids)
+        lower_bounds = np.where(self.present, self.lower_bounds, 0.0)
+        upper_bounds = np.where(self.present, self.upper_bounds, 0.0)
+        # HiGHS minimizes, so flip the sign of the objective to maximize it
+        sign = -1.0 if self.maximize else 1.0
+        costs = np.zeros(col_count)
+        if self.objective is not None:
+            costs[self.objective] = sign
+        self.highs = self.update_highs(
+            self.highs, self.highs_cols, lower_bounds, upper_bounds, costs
+        )
+        # the bounds and costs HiGHS has now
+        self.highs_cols = (lower_bounds, upper_bounds, costs)
+        self.highs.run()
+        status = self.highs.getModelStatus()
+        if status == highspy.HighsModelStatus.kOptimal:
+            fluxes = np.array(self.highs.getSolution().col_value)
+            fluxes[~self.present] = 0.0
+            objective_value = sign * \
+                self.highs.getInfo().objective_function_value
+            return(FluxSolution('optimal', objective_value, fluxes))
+        if status in [
+            highspy.HighsModelStatus.kInfeasible,
+            highspy.HighsModelStatus.kUnboundedOrInfeasible
+        ]:
+            return(FluxSolution('infeasible', np.nan, np.zeros(col_count)))
+        if status == highspy.HighsModelStatus.kUnbounded:
+            return(FluxSolution('unbounded', np.nan, np.zeros(col_count)))
+        return(FluxSolution('failed', np.nan, np.zeros(col_count)))
+
+    def update_highs(self, highs, old_cols, lower_bounds, upper_bounds,
+        costs):
+        '''
+        Give a persistent HiGHS problem with a column for every reaction in
+        the network (and a row for every metabolite, all held at 0) new
+        column bounds and costs, and return it; if highs is None, make it
+        first. old_cols has the bounds and costs last passed to it, and only
+        the ones that changed since then are updated, so that HiGHS can start
+        from the last optimal basis
+        '''
+        col_count = len(self.rxn_ids)
+        if highs is None:
+            lp = highspy.HighsLp()
+            lp.num_col_ = col_count
+            lp.num_row_ = self.S.shape[0]
+            lp.col_cost_ = costs
+            lp.col_lower_ = lower_bounds
+            lp.col_upper_ = upper_bounds
+            lp.row_lower_ = np.zeros(self.S.shape[0])
+            lp.row_upper_ = np.zeros(self.S.shape[0])
+            lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+            lp.a_matrix_.start_ = self.S.indptr
+            lp.a_matrix_.index_ = self.S.indices
+            lp.a_matrix_.value_ = self.S.data
+            highs = highspy.Highs()
+            highs.setOptionValue('output_flag', False)
+            highs.passModel(lp)
+            return(highs)
+        # add columns for any reactions added since the last solve
+        old_count = highs.getNumCol()
+        if col_count > old_count:
+            new_cols = self.S[:,old_count:]
+            highs.addCols(
+                col_count - old_count, costs[old_count:],
+                lower_bounds[old_count:], upper_bounds[old_count:],
+                new_cols.nnz, new_cols.indptr[:-1], new_cols.indices,
+                new_cols.data
+            )
+        # only pass along the bounds and costs that changed since the last
+        # time they were passed to HiGHS (comparing against our own copies
+        # instead of asking HiGHS for its LP, which would copy all of it)
+        (old_lower, old_upper, old_costs) = old_cols
+        changed = np.flatnonzero(
+            (old_lower[:old_count] != lower_bounds[:old_count]) |
+            (old_upper[:old_count] != upper_bounds[:old_count])
+        )
+        if len(changed) > 0:
+            highs.changeColsBounds(
+                len(changed), changed, lower_bounds[changed],
+                upper_bounds[changed]
+            )
+        changed = np.flatnonzero(old_costs[:old_count] != costs[:old_count])
+        if len(changed) > 0:
+            highs.changeColsCost(len(changed), changed, costs[changed])
+        return(highs)
+
+    def to_cobra(self):
+        '''
+        Make a COBRApy model with the reactions currently present in this
+        network (and all of its metabolites, like the models the pruning
+        functions return)
+        '''
+        model = cobra.Model('string_chem')
+        cobra_mets = [
+            cobra.Metabolite(met, compartment = 'c') for met in self.met_ids
+        ]
+        cobra_rxns = list()
+        for i in np.flatnonzero(self.present):
+            rxn = cobra.Reaction(
+                self.rxn_ids[i],
+                lower_bound = self.lower_bounds[i],
+                upper_bound = self.upper_bounds[i]
+            )
+            start = self.S.indptr[i]
+            end = self.S.indptr[i+1]
+            rxn.add_metabolites({
+                cobra_mets[met]: coef for (met, coef) in
+                zip(self.S.indices[start:end], self.S.data[start:end])
+            })
+            cobra_rxns.append(rxn)
+        model.add_metabolites(cobra_mets)
+        model.add_reactions(cobra_rxns)
+        if self.objective is not None and self.present[self.objective]:
+            model.objective = self.rxn_ids[self.objective]
+            if not self.maximize:
+                model.objective_direction = 'min'
+        return(model)
+
+class SharedNetwork():
+    # a FluxNetwork's arrays in shared memory, for handing to worker processes
+    def __init__(self, network):
+        '''
+        Copy the stoichiometric matrix and reaction bounds of a FluxNetwork
+        into blocks of shared memory, so that every worker process in a pool
+        can read the same copy of the universal network instead of getting
+        its own pickled copy (solver and all) with every task. Pickling a
+        SharedNetwork (e.g. to pass it to a Pool initializer) only sends the
+        names of the blocks and the reaction and metabolite ids; each worker
+        then makes its own FluxNetwork or COBRApy model out of the shared
+        arrays with to_flux_network or to_cobra.
+
+        The process that made the SharedNetwork should call unlink once all
+        of the workers are done with it.
+        '''
+        S = sparse.csc_matrix(network.S)
+        arrays = {
+            'data': S.data,
+            'indices': S.indices,
+            'indptr': S.indptr,
+            'lower_bounds': network.lower_bounds,
+            'upper_bounds': network.upper_bounds
+        }
+        self.shape = S.shape
+        self.rxn_ids = list(network.rxn_ids)
+        self.met_ids = list(network.met_ids)
+        self.blocks = dict()
+        # name, shape and dtype of the block each array is in
+        self.layout = dict()
+        for (name, array) in arrays.items():
+            # shared memory blocks can't be empty
+            block = shared_memory.SharedMemory(
+                create = True, size = max(array.nbytes, 1)
+            )
+            np.ndarray(array.shape, array.dtype, buffer = block.buf)[:] = array
+            self.blocks[name] = block
+            self.layout[name] = (block.name, array.shape, array.dtype.str)
+
+    def __getstate__(self):
+        # only send the names of the blocks; the process on the other end
+        # attaches to them itself
+        state = self.__dict__.copy()
+        state['blocks'] = None
+        return(state)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.blocks = {
+            name: shared_memory.SharedMemory(block_name)
+            for (name, (block_name, shape, dtype)) in self.layout.items()
+        }
+
+    def array(self, name):
+        '''
+        Get a numpy array that reads one of the shared arrays ('data',
+        'indices', 'indptr', 'lower_bounds' or 'upper_bounds') without
+        copying it
+        '''
+        (block_name, shape, dtype) = self.layout[name]
+        return(np.ndarray(shape, dtype, buffer = self.blocks[name].buf))
+
+    def to_flux_network(self, solver = None):
+        '''
+        Make a FluxNetwork whose stoichiometric matrix is read straight out of
+        shared memory; its reaction bounds are copies, since those are
+        different in every process
+        '''
+        S = sparse.csc_matrix(
+            (self.array('data'), self.array('indices'), self.array('indptr')),
+            shape = self.shape
+        )
+        return(FluxNetwork(
+            S,
+            self.array('lower_bounds').copy(),
+            self.array('upper_bounds').copy(),
+            self.rxn_ids,
+            self.met_ids,
+            solver = solver
+        ))
+
+    def to_cobra(self):
+        '''
+        Make a COBRApy model of the whole network (e.g. to use as the
+        universal model for SubNetworks in a worker process)
+        '''
+        return(self.to_flux_network().to_cobra())
+
+    def unlink(self):
+        '''
+        Free the shared memory; only the process that made this SharedNetwork
+        should do this, after every process using it is done
+        '''
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+
+class SubNetwork():
+    # a cheap view of part of a universal network that pruners can work on
+    # without copying the whole COBRApy model
+    def __init__(self, universal, mask = None, bm = None, inputs = None,
+        input_bound = 100.0):
+        '''
+        A subnetwork of a universal network (a COBRApy model that's shared
+        between every view of it and never altered outside of a with block):
+        a mask with one entry per reaction in the universal model saying which
+        ones are present, plus a biomass reaction and input reactions that
+        only exist in this subnetwork
+
+        bm is either a dict of metabolite ids to stoichiometric coefficients
+        or a list of metabolite ids that are all consumed with a coefficient
+        of -1 (like the biomass reactions choose_bm_mets makes), and inputs is
+        a list of ids of metabolites that get input reactions with an upper
+        bound of input_bound (like the ones choose_inputs makes)
+        '''
+        self.universal = universal
+        if mask is None:
+            mask = np.ones(len(universal.reactions), dtype = bool)
+        self.mask = np.asarray(mask, dtype = bool)
+        if bm is None:
+            bm = dict()
+        elif not isinstance(bm, dict):
+            bm = {met_id: -1.0 for met_id in bm}
+        self.bm = bm
+        self.inputs = list() if inputs is None else list(inputs)
+        self.input_bound = input_bound
+
+    @property
+    def bm_id(self):
+        # same format as the ids of biomass reactions from choose_bm_mets
+        return('+'.join(self.bm.keys()) + '->' if self.bm else None)
+
+    @property
+    def rxn_ids(self):
+        # ids of every reaction in the subnetwork, including the overlays (in
+        # the order apply adds them)
+        rxn_ids = [
+            self.universal.reactions[i].id for i in np.flatnonzero(self.mask)
+        ]
+        if self.bm:
+            rxn_ids.append(self.bm_id)
+        rxn_ids += ['->' + met_id for met_id in self.inputs]
+        return(rxn_ids)
+
+    def __len__(self):
+        return(int(self.mask.sum()) + len(self.inputs) + bool(self.bm))
+
+    def make_overlays(self, met_dict):
+        '''
+        Make COBRApy reactions for the biomass and input reactions using the
+        metabolite objects in met_dict, biomass first, which is the order
+        choose_bm_mets and then choose_inputs add them to a model in (so the
+        solver sees the same problem either way)
+        '''
+        overlays = list()
+        bm_rxn = None
+        if self.bm:
+            bm_rxn = cobra.Reaction(
+                self.bm_id, lower_bound = 0.0, upper_bound = 1000.0
+            )
+            bm_rxn.add_metabolites({
+                met_dict[met_id]: coef for (met_id, coef) in self.bm.items()
+            })
+            overlays.append(bm_rxn)
+        for met_id in self.inputs:
+            in_rxn = cobra.Reaction(
+                '->' + met_id, lower_bound = 0.0,
+                upper_bound = self.input_bound
+            )
+            in_rxn.add_metabolites({met_dict[met_id]: 1.0})
+            overlays.append(in_rxn)
+        return((overlays, bm_rxn))
+
+    def apply(self, model):
+        '''
+        Turn the universal model into this subnetwork by knocking out every
+        reaction not in the mask and adding the biomass and input reactions.
+        Only ever call this on self.universal inside a with block, so that all
+        of these changes are undone at the end of the block. Returns the
+        biomass reaction (which is also made the objective)
+        '''
+        for i in np.flatnonzero(~self.mask):
+            model.reactions[i].bounds = (0, 0)
+        (overlays, bm_rxn) = self.make_overlays(
+            {met.id: met for met in model.metabolites}
+        )
+        model.add_reactions(overlays)
+        if bm_rxn is not None:
+            model.objective = bm_rxn
+        return(bm_rxn)
+
+    def remove(self, rxn_ids):
+        '''
+        Make a new view of the same universal network without the given
+        reactions (the biomass reaction can't be removed)
+        '''
+        rxn_ids = set(rxn_ids)
+        mask = self.mask.copy()
+        for rxn_id in rxn_ids:
+            if rxn_id in self.universal.reactions:
+                mask[self.universal.reactions.index(rxn_id)] = False
+        inputs = [
+            met_id for met_id in self.inputs if '->' + met_id not in rxn_ids
+        ]
+        return(SubNetwork(
+            self.universal, mask, self.bm, inputs, self.input_bound
+        ))
+
+    def optimize(self):
+        '''
+        Do FBA on the subnetwork (on the universal model, inside a with block)
+        and return the COBRApy solution
+        '''
+        with self.universal as model:
+            self.apply(model)
+            solution = model.optimize()
+        return(solution)
+
+    def to_cobra(self):
+        '''
+        Make a standalone COBRApy model of the subnetwork (with all of the
+        universal network's metabolites, like the models the pruning functions
+        return when given COBRApy models)
+        '''
+        model = cobra.Model(self.universal.id)
+        met_dict = {
+            met.id: cobra.Metabolite(met.id, compartment = met.compartment)
+            for met in self.universal.metabolites
+        }
+        cobra_rxns = list()
+        for i in np.flatnonzero(self.mask):
+            old_rxn = self.universal.reactions[i]
+            rxn = cobra.Reaction(
+                old_rxn.id,
+                lower_bound = old_rxn.lower_bound,
+                upper_bound = old_rxn.upper_bound
+            )
+            rxn.add_metabolites({
+                met_dict[met.id]: coef
+                for (met, coef) in old_rxn.metabolites.items()
+            })
+            cobra_rxns.append(rxn)
+        (overlays, bm_rxn) = self.make_overlays(met_dict)
+        model.add_metabolites(list(met_dict.values()))
+        model.add_reactions(cobra_rxns + overlays)
+        if bm_rxn is not None:
+            model.objective = bm_rxn.id
+        return(model)
+
+class FeasibilityOracle():
+    # decides whether an environment can support a biomass reaction on a
+    # complete universal network from monomer compositions alone
+    def __init__(self, met_ids, counts, allow_export = True,
+        has_reactions = True):
+        '''
+        Every reaction in a universal string chemistry network is a reversible
+        fission/fusion reaction that conserves monomers, so any input can be
+        broken all the way down into its monomers and those can be fused into
+        any other metabolite. With export reactions (to get rid of leftovers),
+        biomass can therefore be made if and only if every monomer in the
+        biomass precursors appears in at least one input. Without export
+        reactions, inputs missing a monomer still can't make biomass, but
+        inputs that have every monomer might not be able to make it without
+        accumulating something, so those need FBA to decide
+
+        met_ids is a list of metabolite ids and counts is an array with one
+        row per metabolite (in the same order) and one column per monomer
+        giving how many of each monomer is in each metabolite (like the one
+        CreateNetwork.count_monomers makes). This only holds for complete
+        universal networks, not for pruned networks or SubNetworks with
+        reactions masked out
+        '''
+        self.met_ids = list(met_ids)
+        self.met_index = {met: i for (i, met) in enumerate(self.met_ids)}
+        self.counts = np.asarray(counts)
+        self.allow_export = allow_export
+        # a network with only monomers can't turn anything into anything
+        self.has_reactions = has_reactions
+
+    @classmethod
+    def from_network(cls, SCN, allow_export = True):
+        '''
+        Make an oracle for the universal network described by a CreateNetwork
+        object (made into a COBRApy model with the same value of allow_export)
+        '''
+        return(cls(
+            SCN.met_list, SCN.count_monomers(), allow_export, SCN.max_len > 1
+        ))
+
+    def decide(self, bm_mets, in_mets):
+        '''
+        Given the ids of the biomass precursors and of the input metabolites,
+        return True if biomass can definitely be made, False if it definitely
+        can't, or None if FBA is needed to decide
+        '''
+        bm_monos = self.counts[[self.met_index[met] for met in bm_mets]]
+        in_monos = self.counts[[self.met_index[met] for met in in_mets]]
+        # monomers can't be made out of nothing
+        if np.any(bm_monos.any(axis = 0) & ~in_monos.any(axis = 0)):
+            return(False)
+        if self.allow_export and self.has_reactions:
+            return(True)
+        return(None)
+
+class EnvironmentSampler():
+    # draws distinct viable environments for one biomass reaction without
+    # doing any FBA or ever drawing the same environment twice
+    def __init__(self, oracle, bm_mets, n, rng = random):
+        '''
+        Draw sets of n input metabolites that can make the biomass precursors
+        in bm_mets (a list of metabolite ids) uniformly at random and without
+        replacement, using the monomer compositions in a FeasibilityOracle
+
+        Every candidate input metabolite (i.e. anything that isn't a biomass
+        precursor) is grouped by which monomers it contains. An environment
+        is viable if the monomers in its metabolites cover the monomers in
+        the biomass precursors, so the viable environments are all of the ways
+        of picking n metabolites from a viable multiset of groups; there are
+        at most a few thousand of those multisets, so we can count the
+        environments each of them contains and number every viable
+        environment without listing them. Drawing an environment is then just
+        drawing a number that hasn't been drawn yet and working out which
+        environment it belongs to, which takes the same amount of time no
+        matter how rare viable environments are
+
+        If the oracle can't decide feasibility on its own (e.g. there are no
+        export reactions), exact is False and the environments this draws only
+        have the right monomers, so they still need to be checked with FBA.
+        rng can be a random.Random object to draw with instead of the random
+        module
+        '''
+        self.n = n
+        self.rng = rng
+        self.exact = oracle.allow_export and oracle.has_reactions
+        k = oracle.counts.shape[1]
+        # one bit per monomer that each metabolite contains
+        masks = (oracle.counts > 0).astype(np.int64) @ (1 << np.arange(k))
+        bm_indices = [oracle.met_index[met] for met in bm_mets]
+        needed = np.bitwise_or.reduce(masks[bm_indices])
+        is_candidate = np.ones(len(masks), dtype = bool)
+        is_candidate[bm_indices] = False
+        self.groups = dict()
+        for mask in np.unique(masks[is_candidate]).tolist():
+            self.groups[mask] = [
+                oracle.met_ids[i]
+                for i in np.flatnonzero(is_candidate & (masks == mask))
+            ]
+        # find every multiset of n groups that covers all the needed monomers
+        # and count how many environments can be drawn from each one
+        self.multisets = list()
+        self.ends = list()
+        self.total = 0
+        for multiset in it.combinations_with_replacement(self.groups, n):
+            union = 0
+            for mask in multiset:
+                union |= mask
+            if union & needed != needed:
+                continue
+            # how many metabolites to pick from each group
+            picks = [(mask, multiset.count(mask)) for mask in set(multiset)]
+            size = 1
+            for (mask, count) in picks:
+                size *= math.comb(len(self.groups[mask]), count)
+            if size == 0:
+                continue
+            self.total += size
+            self.multisets.append(picks)
+            self.ends.append(self.total)
+        # lazy Fisher-Yates shuffle of range(self.total): only the positions
+        # that have been swapped are stored
+        self.drawn = 0
+        self.swaps = dict()
+
+    def __len__(self):
+        # number of environments that can be drawn in total
+        return(self.total)
+
+    def unrank(self, rank):
+        '''
+        Find the environment with the given number (between 0 and
+        self.total - 1)
+        '''
+        i = bisect.bisect_right(self.ends, rank)
+        rank -= self.ends[i - 1] if i > 0 else 0
+        env = list()
+        for (mask, count) in self.multisets[i]:
+            group = self.groups[mask]
+            group_size = math.comb(len(group), count)
+            (rank, group_rank) = divmod(rank, group_size)
+            env += [group[j] for j in unrank_combination(group_rank, count)]
+        return(env)
+
+    def draw(self):
+        '''
+        Draw an environment (a list of metabolite ids) that hasn't been drawn
+        before, or return None if every environment has been drawn
+        '''
+        if self.drawn >= self.total:
+            return(None)
+        j = self.rng.randrange(self.drawn, self.total)
+        rank = self.swaps.get(j, j)
+        self.swaps[j] = self.swaps.pop(self.drawn, self.drawn)
+        self.drawn += 1
+        return(self.unrank(rank))
+
+def unrank_combination(rank, k):
+    '''
+    Find the k-element combination of non-negative integers with the given
+    rank in colexicographic order (the combinatorial number system)
+    '''
+    combo = list()
+    for i in range(k, 0, -1):
+        # find the largest c with comb(c, i) <= rank
+        (low, high) = (i - 1, i)
+        while math.comb(high, i) <= rank:
+            high *= 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if math.comb(mid, i) <= rank:
+                low = mid
+            else:
+                high = mid
+        combo.append(low)
+        rank -= math.comb(low, i)
+    return(combo)
+
 def choose_inputs(n, model, bm_rxn=cobra.Reaction()):
     '''
     Choose n random metabolites to get exchange reactions that produce them
@@ -333,221 +1582,2676 @@ def choose_bm_mets(n, model):
     # the model object is modified in-place, so there's no need to return it
     return(bm_rxn)
 
-def min_flux_prune(cobra_model, bm_rxn):
+def choose_viable_inputs(n, model, bm_rxn, oracle = None, sampler = None):
     '''
-    Iteratively remove reactions from the network by identifying reactions with
-    the smallest flux until removing a reaction causes biomass flux to drop to
-    zero
+    Replace the input reactions in model with input reactions for n randomly
+    chosen metabolites that can be used to make biomass (i.e. keep choosing
+    new inputs until the biomass reaction can carry flux). If a
+    FeasibilityOracle for the universal network is given, it's used to reject
+    (or accept) most environments without doing FBA; FBA is only done when it
+    can't decide. Returns the list of input metabolites
+
+    If an EnvironmentSampler for bm_rxn is given instead, environments are
+    drawn from it, so they're never drawn twice and (if the sampler is exact)
+    never need FBA; returns None once every environment has been drawn
     '''
-    # removing reactions happens in-place, so we need to make a copy of the 
-    # cobra model before altering it in any way
-    cobra_net = cobra_model.copy()
-    # assign reaction fluxes to everything before starting the loop
-    solution = cobra_net.optimize()
-    bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-    while True:
-        # remove all non-boundary reactions with no flux
-        no_flux_rxn_ids = solution.fluxes[solution.fluxes == 0].index
-        boundary_rxn_ids = [rxn.id for rxn in cobra_net.boundary]
-        ids_to_remove = [
-            rxn for rxn in no_flux_rxn_ids if rxn not in boundary_rxn_ids
+    # don't want to remove all boundary reactions because that would also
+    # remove all of the export reactions
+    model.remove_reactions([
+        rxn for rxn in model.boundary if rxn.id.startswith('->')
+    ])
+    bm_met_ids = [met.id for met in bm_rxn.metabolites]
+    if sampler is None:
+        # same set of candidates choose_inputs uses
+        candidates = [
+            met for met in model.metabolites if met not in bm_rxn.metabolites
         ]
-        rxns_to_remove = [
-            cobra_net.reactions.get_by_id(rxn_id) for rxn_id in ids_to_remove
-        ]
-        cobra_net.remove_reactions(rxns_to_remove)
-        # find remaining reaction with smallest flux and remove it
-        flux_bearers = solution.fluxes[solution.fluxes != 0]
-        min_flux_rxn_id = flux_bearers.abs().idxmin()
-        min_flux_rxn = cobra_net.reactions.get_by_id(min_flux_rxn_id)
-        # if this reaction is the biomass reaction, we're clearly done pruning
-        if min_flux_rxn.id == bm_rxn.id:
-            break
-        cobra_net.remove_reactions([min_flux_rxn])
-        # see if that made the network unsolvable; if so, add the reaction back
-        # and exit the while loop
-        solution = cobra_net.optimize()
-        # sometimes the solution will be feasible but the flux through the
-        # biomass reaction will be some absurdly small number and then if you
-        # do FBA on the same network again you won't get a feasible solution
-        # so can't just check to see if the flux is 0
+    while True:
+        feasible = None
+        if sampler is not None:
+            in_met_ids = sampler.draw()
+            if in_met_ids is None:
+                return(None)
+            in_mets = [model.metabolites.get_by_id(met) for met in in_met_ids]
+            if sampler.exact:
+                feasible = True
+        else:
+            in_mets = random.sample(candidates, n)
+        if oracle is not None and feasible is None:
+            feasible = oracle.decide(bm_met_ids, [met.id for met in in_mets])
+            if feasible is False:
+                continue
+        in_rxns = list()
+        for met in in_mets:
+            in_rxn = cobra.Reaction(
+                '->' + met.id,
+                upper_bound = 100.0, # only allow importing of this metabolite
+                lower_bound = 0.0
+            )
+            in_rxn.add_metabolites({met: 1.0})
+            in_rxns.append(in_rxn)
+        model.add_reactions(in_rxns)
+        if feasible is True:
+            return(in_mets)
+        # can't just check solution.status because sometimes it's feasible
+        # but the flux through the biomass reaction is vanishingly small
+        solution = model.optimize()
         bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-        if solution.status == 'infeasible' or bm_rxn_flux < 10e-10:
-            cobra_net.add_reaction(min_flux_rxn)
-            break
-    # we kept all of the boundary reactions around until now; drop the ones
-    # that have no flux
-    # have to recreate the solution object first since we probably just added
-    # an essential reaction back to the network after discovering that it was
-    # essential
-    solution = cobra_net.optimize()
-    cobra_net.remove_reactions(solution.fluxes[solution.fluxes == 0].index)
-    return(cobra_net)
+        if solution.status != 'infeasible' and bm_rxn_flux >= 10e-10:
+            return(in_mets)
+        model.remove_reactions(in_rxns)
 
-def random_prune(full_model, bm_rxn):
-    '''
-    Remove all reactions from a given network with no flux, randomly choose one
-    of the remaining reactions to remove and repeat those steps until removing
-    any reaction from the network would make flux through the biomass reaction
-    impossible
-    '''
-    # removing reactions happens in-place, so we need to make a copy of the
-    # cobra model before altering it in any way
-    pruned_model = full_model.copy()
-    # start by doing FBA and removing all reactions with no flux that are
-    # not an export reaction
-    solution = pruned_model.optimize()
-    no_flux_rxn_ids = solution.fluxes[solution.fluxes == 0].index
-    export_rxn_ids = [
-        rxn.id for rxn in pruned_model.boundary if rxn.id.endswith('->')
-    ]
-    rxns_to_remove = [
-        rxn for rxn in no_flux_rxn_ids if rxn not in export_rxn_ids
-    ]
-    pruned_model.remove_reactions(rxns_to_remove)
-    # get a list of all the reaction ids we didn't just remove to loop over
-    # as we try to remove reactions
-    flux_bearer_names = solution.fluxes[solution.fluxes != 0].index
-    # exclude the biomass reaction, since we know we want to keep that
-    flux_bearers = [
-        rxn for rxn in pruned_model.reactions 
-        if rxn.id in flux_bearer_names and rxn.id != bm_rxn.id
-    ]
-    # shuffle this list and then do a for loop over it so that we can tell if
-    # we tried to remove every single possible reaction and failed (i.e. we are
-    # done pruning); if we randomly chose from the list, we wouldn't ever know
-    # that we actually tried every single reaction in the list, and we would
-    # probably needlessly try the same reaction multiple times
-    random.shuffle(flux_bearers)
-    # if this ever reaches the length of flux_bearers, we are done pruning
-    infeas_count = 0
-    while infeas_count < len(flux_bearers):
-        for rxn in flux_bearers:
-            # try to remove the reaction from the model
-            pruned_model.remove_reactions([rxn])
-            # see if there's still a way to get flux through the biomass rxn
-            solution = pruned_model.optimize()
-            # sometimes "feasible" solutions have extremely small fluxes
-            # through the biomass reaction
-            bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-            if solution.status == 'infeasible' or bm_rxn_flux < 10e-10:
-                # keep track of how many times we've gotten a bad solution
-                infeas_count += 1
-                # put this reaction back and get the old solution object back
-                pruned_model.add_reaction(rxn)
-                solution = pruned_model.optimize()
+class FeasibilityCache():
+    # remembers which subnetworks can and can't make biomass so the pruners
+    # don't have to keep asking the solver
+    def __init__(self, max_size = 100000, path = None):
+        '''
+        A cache of answers to "can this subnetwork make biomass?" keyed by a
+        context (see feasibility_context: a fingerprint of the whole network
+        plus its biomass reaction and environment) and a bitset of which of
+        the network's reactions are present
+
+        Since removing reactions can never make biomass flux possible again,
+        a network that contains every reaction of one that can make biomass
+        can too, and a network whose reactions are all in one that can't make
+        biomass can't either, so many questions get answered without ever
+        having been asked before. Only the smallest networks known to make
+        biomass and the largest known not to are kept around to answer them
+        (anything a new answer makes redundant is dropped when it's added),
+        grouped by how many reactions they have, since a network can only
+        contain networks with no more reactions than it has, so only some of
+        the groups ever need to be looked through
+
+        Keeps at most max_size networks and forgets the least recently used
+        ones first. If path is given, the cache starts out with whatever was
+        saved there by save
+        '''
+        self.max_size = max_size
+        self.path = path
+        # (context, bits) -> True or False, least recently used first
+        self.entries = OrderedDict()
+        # context -> (number of reactions -> {bits that can make biomass},
+        # number of reactions -> {bits that can't})
+        self.index = dict()
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as cache_file:
+                for ((context, bits), feasible) in pickle.load(cache_file):
+                    self.add(context, bits, feasible)
+
+    def __len__(self):
+        return(len(self.entries))
+
+    def lookup(self, context, present):
+        '''
+        Return True if the network with the reactions in present (a boolean
+        array, or a bitset from make_bits) is known to be able to make
+        biomass, False if it's known not to and None if we don't know
+        '''
+        bits = make_bits(present)
+        feasible = self.entries.get((context, bits))
+        if feasible is not None:
+            self.entries.move_to_end((context, bits))
+            self.hits += 1
+            return(feasible)
+        (feasibles, infeasibles) = self.index.get(context, (dict(), dict()))
+        count = count_bits(bits)
+        # bitsets are ints, so a & ~b is 0 if every reaction in a is also in b
+        missing = ~bits
+        if any(
+            known & missing == 0 for known in scan_sizes(feasibles, 0, count)
+        ):
+            self.hits += 1
+            return(True)
+        if any(
+            bits & ~known == 0 for known in scan_sizes(infeasibles, count)
+        ):
+            self.hits += 1
+            return(False)
+        self.misses += 1
+        return(None)
+
+    def add(self, context, present, feasible):
+        '''
+        Remember whether the network with the reactions in present can make
+        biomass, unless that already follows from something we know, and
+        forget anything this makes redundant
+        '''
+        bits = make_bits(present)
+        if (context, bits) in self.entries:
+            self.entries.move_to_end((context, bits))
+            return
+        (feasibles, infeasibles) = self.index.setdefault(
+            context, (dict(), dict())
+        )
+        count = count_bits(bits)
+        if feasible:
+            if any(
+                known & ~bits == 0
+                for known in scan_sizes(feasibles, 0, count)
+            ):
+                return
+            redundant = [
+                known for known in scan_sizes(feasibles, count + 1)
+                if bits & ~known == 0
+            ]
+            feasibles.setdefault(count, set()).add(bits)
+        else:
+            if any(
+                bits & ~known == 0 for known in scan_sizes(infeasibles, count)
+            ):
+                return
+            redundant = [
+                known for known in scan_sizes(infeasibles, 0, count - 1)
+                if known & ~bits == 0
+            ]
+            infeasibles.setdefault(count, set()).add(bits)
+        for known in redundant:
+            self.forget(context, known)
+        self.entries[(context, bits)] = bool(feasible)
+        while len(self.entries) > self.max_size:
+            ((old_context, old_bits), _) = self.entries.popitem(last = False)
+            self.unindex(old_context, old_bits)
+
+    def forget(self, context, bits):
+        '''
+        Drop one network (as a bitset) from the cache
+        '''
+        del self.entries[(context, bits)]
+        self.unindex(context, bits)
+
+    def unindex(self, context, bits):
+        '''
+        Drop a network (as a bitset) from the index of known networks, along
+        with its group if it was the last network with that many reactions
+        '''
+        count = count_bits(bits)
+        for sizes in self.index[context]:
+            if bits in sizes.get(count, ()):
+                sizes[count].discard(bits)
+                if len(sizes[count]) == 0:
+                    del sizes[count]
+
+    def save(self, path = None):
+        '''
+        Write the cache to path (or the path it was made with) so that it can
+        be loaded by later runs
+        '''
+        if path is None:
+            path = self.path
+        # write to a temporary file first so that a run that dies partway
+        # through saving doesn't leave a broken cache behind
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as out:
+            pickle.dump(
+                list(self.entries.items()), out,
+                protocol = pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temp_path, path)
+
+def count_bits(bits):
+    '''
+    Count the reactions present in a bitset from make_bits
+    '''
+    return(bin(bits).count('1'))
+
+def scan_sizes(sizes, low, high = None):
+    '''
+    Go through the bitsets in a dict of numbers of reactions to sets of
+    bitsets (like the ones FeasibilityCache keeps) that have at least low
+    and at most high (or any number, if high is None) reactions
+    '''
+    for count in sorted(sizes):
+        if count < low:
+            continue
+        if high is not None and count > high:
+            break
+        yield from sizes[count]
+
+def make_bits(present):
+    '''
+    Turn a boolean array with one entry per reaction into an int whose ith bit
+    is 1 if the ith reaction is present (ints are passed through unchanged)
+    '''
+    if isinstance(present, int):
+        return(present)
+    packed = np.packbits(np.asarray(present, dtype = bool), bitorder = 'little')
+    return(int.from_bytes(packed.tobytes(), 'little'))
+
+# the FeasibilityCache the pruners check before asking the solver whether a
+# network can still make biomass; None (the default) turns caching off
+feasibility_cache = None
+
+def use_feasibility_cache(cache):
+    '''
+    Make every pruning function check a FeasibilityCache (or none, if cache
+    is None) before solving anything just to find out whether a network can
+    still make biomass
+    '''
+    global feasibility_cache
+    feasibility_cache = cache
+
+def feasibility_context(model, bm_rxn):
+    '''
+    Make the context a FeasibilityCache needs for questions about subnetworks
+    of a COBRApy model: a fingerprint of all of the model's reaction ids (in
+    order, since that's what positions in bitsets refer to), the biomass
+    reaction and the environment (ids of the metabolites with input
+    reactions). Returns None if there's no cache in use, so that pruners
+    don't bother with any of this
+    Reaction bounds aren't part of the fingerprint, so don't share a cache
+    between models that only differ in which reactions are reversible
+    '''
+    if feasibility_cache is None:
+        return(None)
+    rxn_ids = [rxn.id for rxn in model.reactions]
+    fingerprint = hashlib.sha1('\n'.join(rxn_ids).encode()).hexdigest()
+    bm = tuple(sorted(
+        (met.id, coef) for (met, coef) in bm_rxn.metabolites.items()
+    ))
+    env = tuple(rxn_id[2:] for rxn_id in rxn_ids if rxn_id.startswith('->'))
+    return((fingerprint, bm, env))
+
+def cached_feasibility(context, present):
+    '''
+    Ask the feasibility cache whether the network with the reactions in
+    present can make biomass (True, False, or None if it doesn't know or
+    there's no cache)
+    '''
+    if context is None:
+        return(None)
+    return(feasibility_cache.lookup(context, present))
+
+def record_feasibility(context, present, feasible):
+    '''
+    Tell the feasibility cache (if there is one) whether the network with the
+    reactions in present can make biomass
+    '''
+    if context is not None:
+        feasibility_cache.add(context, present, feasible)
+
+def reset_basis(model):
+    '''
+    Make the solver of a COBRApy model start its next solve from the standard
+    starting basis instead of wherever its last solve ended up. The LPs the
+    pruners solve have lots of equally good solutions and which one the
+    solver finds depends on where it starts, so this makes results
+    independent of whatever the model was used for before. The order the
+    entries of each row and column of the constraint matrix are stored in
+    also decides which of several equally good pivots the solver takes, and
+    that depends on how the model was built (copying a model reorders them),
+    so they're sorted too. Only does anything for GLPK (COBRApy's default
+    solver)
+    '''
+    if swiglpk is not None and \
+        model.solver.interface.__name__ == 'optlang.glpk_interface':
+        swiglpk.glp_sort_matrix(model.solver.problem)
+        swiglpk.glp_std_basis(model.solver.problem)
+
+def prune_network(find_knockouts, network, bm_rxn = None):
+    '''
+    Prune either a COBRApy model or a SubNetwork with find_knockouts, one of
+    the functions below that knocks reactions out of a COBRApy model in-place
+    and returns the ids of every reaction that should be removed from it
+
+    COBRApy models are copied once and the pruned copy is returned. A
+    SubNetwork is pruned on its universal model inside a with block (so all
+    of the knockouts are undone afterwards and nothing gets copied) and a new
+    SubNetwork is returned; its own biomass reaction is used, so bm_rxn can
+    be left out
+    Either way, the solver starts from the standard basis (see reset_basis),
+    so a SubNetwork gets pruned exactly like a COBRApy model of it would be
+    (e.g. one made with choose_bm_mets and choose_inputs)
+    If a FeasibilityCache is in use (see use_feasibility_cache), every
+    pruner checks it before solving anything just to see whether a network
+    can still make biomass, and adds whatever it finds out to it
+    '''
+    if isinstance(network, SubNetwork):
+        with network.universal as model:
+            bm_rxn = network.apply(model)
+            reset_basis(model)
+            # reactions that aren't in the subnetwork start out knocked out
+            knocked_out = {
+                model.reactions[i].id for i in np.flatnonzero(~network.mask)
+            }
+            rxns_to_remove = find_knockouts(model, bm_rxn, knocked_out)
+        return(network.remove(rxns_to_remove))
+    # removing reactions happens in-place, so we need to make a copy of the
+    # cobra model before altering it in any way
+    cobra_net = network.copy()
+    reset_basis(cobra_net)
+    rxns_to_remove = find_knockouts(cobra_net, bm_rxn, set())
+    cobra_net.remove_reactions(list(rxns_to_remove))
+    return(cobra_net)
+
+def min_flux_prune(cobra_model, bm_rxn = None, block_size = 1,
+    stats = None):
+    '''
+    Iteratively remove reactions from the network by identifying reactions with
+    the smallest flux until removing a reaction causes biomass flux to drop to
+    zero (fluxes smaller than 10e-10 count as no flux; see
+    min_flux_knockouts)
+    If block_size is more than 1, try to remove that many of the reactions
+    with the smallest fluxes with each LP instead of just one, and if that
+    makes biomass flux impossible, split them in half and try each half (the
+    one with the smaller fluxes first), splitting any half that doesn't work
+    again, and so on; pruning stops when removing a single reaction makes
+    biomass flux impossible, just like it does one reaction at a time. This
+    only saves LPs when lots of reactions in a row can be removed, which
+    doesn't happen much in small networks: on (ab,5) networks, blocks usually
+    take as many LPs as removing one reaction at a time or a few more
+    If stats is a dict, the number of LPs solved ('solves') is put in it
+    (see compare_block_solves to find out how many that saved)
+    '''
+    return(prune_network(
+        lambda model, bm, knocked_out: min_flux_knockouts(
+            model, bm, knocked_out, block_size, stats
+        ),
+        cobra_model, bm_rxn
+    ))
+
+def compare_block_solves(cobra_model, bm_rxn = None, block_size = 16):
+    '''
+    Prune a network with min_flux_prune twice, once with block_size and once
+    one reaction at a time, both without the feasibility cache so neither
+    gets answers from the other, and return a dict with the number of LPs
+    each took ('solves' and 'one_at_a_time_solves'), the difference
+    ('solves_saved') and the number of reactions left in each pruned network
+    ('reactions' and 'one_at_a_time_reactions')
+    '''
+    (block_stats, single_stats) = (dict(), dict())
+    cache = feasibility_cache
+    use_feasibility_cache(None)
+    try:
+        pruned = min_flux_prune(cobra_model, bm_rxn, block_size, block_stats)
+        single = min_flux_prune(cobra_model, bm_rxn, 1, single_stats)
+    finally:
+        use_feasibility_cache(cache)
+    return({
+        'solves': block_stats['solves'],
+        'one_at_a_time_solves': single_stats['solves'],
+        'solves_saved': single_stats['solves'] - block_stats['solves'],
+        'reactions': len(get_rxn_ids(pruned)),
+        'one_at_a_time_reactions': len(get_rxn_ids(single))
+    })
+
+def min_flux_knockouts(cobra_net, bm_rxn, knocked_out, block_size = 1,
+    stats = None):
+    '''
+    Knock reactions out of cobra_net the way min_flux_prune does, starting
+    with the reactions in knocked_out, and return the ids of every reaction
+    that should be removed from it
+    '''
+    # rather than removing reactions from the model while we prune (which makes
+    # the solver rebuild its problem and throw away the last solution it
+    # found), knock them out by setting their bounds to zero so every FBA after
+    # the first starts from the last solution; reactions are only actually
+    # removed once we're done pruning
+    # warm-started solves tend to leave absurdly small fluxes (~1e-14) on
+    # reactions that should have none (including knocked-out ones), so any
+    # flux smaller than the cutoff we use for biomass flux counts as no flux;
+    # checking for fluxes of exactly 0 would treat those as flux bearers and
+    # try to knock out reactions that are already knocked out
+    # warm starts also land on different (equally good) solutions than
+    # re-solving after removing reactions did, so this usually stops at a
+    # different minimal network than removing reactions used to
+    rxns = cobra_net.reactions
+    # keep track of which reactions are boundary reactions and which have
+    # been knocked out with arrays instead of looking reactions up by id over
+    # and over
+    boundary = np.zeros(len(rxns), dtype = bool)
+    boundary[[rxns.index(rxn) for rxn in cobra_net.boundary]] = True
+    knocked = np.array([rxn.id in knocked_out for rxn in rxns], dtype = bool)
+    bm_index = rxns.index(bm_rxn.id)
+    context = feasibility_context(cobra_net, bm_rxn)
+    # reading fluxes straight out of the solver is much faster than making a
+    # COBRApy solution object after every solve
+    flux_vars = make_flux_vars(cobra_net)
+    # assign reaction fluxes to everything before starting the loop
+    cobra_net.solver.optimize()
+    fluxes = get_flux_array(cobra_net, flux_vars)
+    # how many LPs we've solved and whether pruning stopped on a knockout
+    # that made biomass flux impossible (rather than on the biomass reaction
+    # having the smallest flux)
+    solves = 0
+    failed = False
+    while not failed:
+        # knock out all non-boundary reactions with no flux
+        no_flux = np.abs(fluxes) < 10e-10
+        for i in np.flatnonzero(no_flux & ~boundary & ~knocked):
+            rxns[i].bounds = (0, 0)
+            knocked[i] = True
+        # find the remaining reactions with the smallest fluxes (ties go to
+        # whichever comes first in the model) and knock them out; everything
+        # from the biomass reaction on is off limits, so if it has the
+        # smallest flux, we're clearly done pruning
+        by_flux = np.argsort(
+            np.where(no_flux, np.inf, np.abs(fluxes)), kind = 'stable'
+        )
+        min_flux_indices = by_flux[:np.flatnonzero(by_flux == bm_index)[0]]
+        if len(min_flux_indices) == 0:
+            break
+        # blocks of reactions left to try to knock out, last one first; a
+        # block that can't all be knocked out at once is split in half and
+        # both halves are tried, the one with the smaller fluxes first
+        blocks = [min_flux_indices[:block_size]]
+        while len(blocks) > 0:
+            block = blocks.pop()
+            # if we already know these knockouts stop biomass production, we
+            # don't need to solve anything to find that out
+            present = ~knocked
+            present[block] = False
+            old_bounds = [rxns[i].bounds for i in block]
+            if cached_feasibility(context, present) is False:
+                feasible = False
             else:
-                # remove all non-export reactions with no flux
-                no_flux_rxn_ids = solution.fluxes[solution.fluxes == 0].index
-                export_rxn_ids = [
-                    rxn.id for rxn in pruned_model.boundary 
-                    if rxn.id.endswith('->')
-                ]
-                rxns_to_remove = [
-                    rxn for rxn in no_flux_rxn_ids if rxn not in export_rxn_ids
-                ]
-                pruned_model.remove_reactions(rxns_to_remove)
+                for i in block:
+                    rxns[i].bounds = (0, 0)
+                # see if that made the network unsolvable
+                status = cobra_net.solver.optimize()
+                solves += 1
+                # sometimes the solution will be feasible but the flux
+                # through the biomass reaction will be some absurdly small
+                # number and then if you do FBA on the same network again you
+                # won't get a feasible solution so can't just check to see if
+                # the flux is 0
+                feasible = status == 'optimal'
+                if feasible:
+                    new_fluxes = get_flux_array(cobra_net, flux_vars)
+                    feasible = new_fluxes[bm_index] >= 10e-10
+                record_feasibility(context, present, feasible)
+            if feasible:
+                knocked[block] = True
+                fluxes = new_fluxes
+                continue
+            # if it was, put the reactions' bounds back and try each half of
+            # them, unless there was only one, in which case we're done
+            for (i, bounds) in zip(block, old_bounds):
+                rxns[i].bounds = bounds
+            if len(block) == 1:
+                failed = True
+                break
+            half = len(block) // 2
+            blocks += [block[half:], block[:half]]
+    if stats is not None:
+        stats['solves'] = solves
+    # we kept all of the boundary reactions around until now; drop the ones
+    # that have no flux along with everything we knocked out
+    # have to solve again first since we probably just restored an essential
+    # reaction after discovering that it was essential
+    cobra_net.solver.optimize()
+    fluxes = get_flux_array(cobra_net, flux_vars)
+    to_remove = np.flatnonzero((np.abs(fluxes) < 10e-10) | knocked)
+    return({rxns[i].id for i in to_remove} | knocked_out)
+
+def make_flux_vars(model):
+    '''
+    Find the positions of every reaction's forward and reverse variables
+    among the variables of a COBRApy model's solver problem, so that
+    get_flux_array can read fluxes for all of them at once. Only valid until
+    reactions are added to or removed from the model
+    '''
+    var_index = {var.name: i for (i, var) in enumerate(model.variables)}
+    forward = np.array([var_index[rxn.id] for rxn in model.reactions])
+    reverse = np.array([var_index[rxn.reverse_id] for rxn in model.reactions])
+    return((forward, reverse))
+
+def get_flux_array(model, flux_vars):
+    '''
+    Get the flux through every reaction in a COBRApy model from its last
+    solve as a numpy array (in the same order as model.reactions and with the
+    same values as model.optimize().fluxes), given the output of
+    make_flux_vars for that model
+    '''
+    (forward, reverse) = flux_vars
+    primals = np.fromiter(
+        model.solver.primal_values.values(), dtype = np.float64,
+        count = len(model.variables)
+    )
+    return(primals[forward] - primals[reverse])
+
+def random_prune(full_model, bm_rxn = None):
+    '''
+    Remove all reactions from a given network with no flux, randomly choose one
+    of the remaining reactions to remove and repeat those steps until removing
+    any reaction from the network would make flux through the biomass reaction
+    impossible
+    '''
+    return(prune_network(random_knockouts, full_model, bm_rxn))
+
+def random_knockouts(pruned_model, bm_rxn, knocked_out):
+    '''
+    Knock reactions out of pruned_model the way random_prune does, starting
+    with the reactions in knocked_out, and return the ids of every reaction
+    that should be removed from it
+    '''
+    # reactions are knocked out by setting their bounds to zero instead of
+    # being removed so that the solver can start each FBA from the last
+    # solution (see min_flux_prune); they're removed once we're done pruning
+    rxns = pruned_model.reactions
+    export = np.zeros(len(rxns), dtype = bool)
+    export[[
+        rxns.index(rxn) for rxn in pruned_model.boundary
+        if rxn.id.endswith('->')
+    ]] = True
+    knocked = np.array([rxn.id in knocked_out for rxn in rxns], dtype = bool)
+    bm_index = rxns.index(bm_rxn.id)
+    # taking reactions out of a network can never make it able to produce
+    # biomass again, so once knocking a reaction out has stopped biomass
+    # production, it'll do the same in every network we get to from here on
+    # and never needs to be tested again (we know we want to keep the biomass
+    # reaction from the start)
+    essential = np.zeros(len(rxns), dtype = bool)
+    essential[bm_index] = True
+    context = feasibility_context(pruned_model, bm_rxn)
+    flux_vars = make_flux_vars(pruned_model)
+    def knock_out_no_flux(fluxes):
+        # knock out all reactions with no flux that aren't export reactions
+        # (tiny fluxes count as none; see min_flux_knockouts)
+        no_flux = np.abs(fluxes) < 10e-10
+        for i in np.flatnonzero(no_flux & ~export & ~knocked):
+            rxns[i].bounds = (0, 0)
+            knocked[i] = True
+    def find_flux_bearers(fluxes):
+        # indices of the reactions we might still be able to remove
+        return(list(np.flatnonzero((np.abs(fluxes) >= 10e-10) & ~essential)))
+    # start by doing FBA and knocking out all reactions with no flux that are
+    # not an export reaction
+    pruned_model.solver.optimize()
+    fluxes = get_flux_array(pruned_model, flux_vars)
+    knock_out_no_flux(fluxes)
+    # get a list of all the reactions we didn't just knock out to loop over
+    # as we try to remove reactions
+    flux_bearers = find_flux_bearers(fluxes)
+    # shuffle this list and then do a for loop over it so that we can tell if
+    # we tried to remove every single possible reaction and failed (i.e. we are
+    # done pruning); if we randomly chose from the list, we wouldn't ever know
+    # that we actually tried every single reaction in the list, and we would
+    # probably needlessly try the same reaction multiple times
+    random.shuffle(flux_bearers)
+    while True:
+        for i in flux_bearers:
+            if essential[i]:
+                continue
+            # other runs on this network may already have found out that this
+            # knockout stops biomass production (or that one that leaves even
+            # fewer reactions doesn't)
+            present = ~knocked
+            present[i] = False
+            if cached_feasibility(context, present) is False:
+                essential[i] = True
+                continue
+            # try to knock the reaction out
+            rxn = rxns[i]
+            old_bounds = rxn.bounds
+            rxn.bounds = (0, 0)
+            # see if there's still a way to get flux through the biomass rxn
+            status = pruned_model.solver.optimize()
+            if status == 'optimal':
+                new_fluxes = get_flux_array(pruned_model, flux_vars)
+            # sometimes "feasible" solutions have extremely small fluxes
+            # through the biomass reaction
+            feasible = status == 'optimal' and new_fluxes[bm_index] >= 10e-10
+            record_feasibility(context, present, feasible)
+            if not feasible:
+                # put this reaction back; the fluxes we already have are
+                # still a solution for the network with it in there
+                rxn.bounds = old_bounds
+                essential[i] = True
+            else:
+                knocked[i] = True
+                fluxes = new_fluxes
+                knock_out_no_flux(fluxes)
                 # recreate the list of non-biomass reaction flux bearers
-                flux_bearer_names = solution.fluxes[solution.fluxes != 0].index
-                flux_bearers = [
-                    rxn for rxn in pruned_model.reactions
-                    if rxn.id in flux_bearer_names and rxn.id != bm_rxn.id
-                ]
-                # reset infeas_count
-                infeas_count = 0
+                flux_bearers = find_flux_bearers(fluxes)
                 break
+        else:
+            # every reaction left is essential, so we're done pruning
+            break
     # we kept the exchange reactions around to make sure waste could be
-    # exported if needed but now they can all be dropped
-    pruned_model.remove_reactions(solution.fluxes[solution.fluxes == 0].index)
-    return(pruned_model)
+    # exported if needed but now they can all be dropped along with everything
+    # we knocked out
+    to_remove = np.flatnonzero((np.abs(fluxes) < 10e-10) | knocked)
+    return({rxns[i].id for i in to_remove} | knocked_out)
 
-def bm_impact_prune(cobra_model, bm_rxn):
+def bm_impact_prune(cobra_model, bm_rxn = None, processes = 1):
     '''
     Prune network by identifying reactions whose removal has minimal impact on
     the biomass flux and iteratively removing them until removing any more
     reactions would eliminate flux through the biomass reaction
+    If processes is more than 1, the knockouts tested in each round are split
+    between that many worker processes (which can't be done from inside
+    another pool's workers, e.g. from run_sweep with processes > 1)
     '''
-    # removing reactions happens in-place, so we need to make a copy of the 
-    # cobra model before altering it in any way
-    cobra_net = cobra_model.copy()
+    return(prune_network(
+        lambda model, bm, knocked_out: bm_impact_knockouts(
+            model, bm, knocked_out, processes
+        ),
+        cobra_model, bm_rxn
+    ))
+
+def bm_impact_knockouts(cobra_net, bm_rxn, knocked_out, processes = 1):
+    '''
+    Knock reactions out of cobra_net the way bm_impact_prune does, starting
+    with the reactions in knocked_out, and return the ids of every reaction
+    that should be removed from it
+    '''
+    # reactions are knocked out by setting their bounds to zero instead of
+    # being removed so that the solver can start each FBA from the last
+    # solution (see min_flux_prune); they're removed once we're done pruning
+    rxns = cobra_net.reactions
+    boundary = np.zeros(len(rxns), dtype = bool)
+    boundary[[rxns.index(rxn) for rxn in cobra_net.boundary]] = True
+    knocked = np.array([rxn.id in knocked_out for rxn in rxns], dtype = bool)
+    bm_index = rxns.index(bm_rxn.id)
+    context = feasibility_context(cobra_net, bm_rxn)
+    flux_vars = make_flux_vars(cobra_net)
+    # each worker gets its own copy of the network once and keeps up with
+    # the knockouts we make here as it goes
+    pool = None
+    if processes > 1:
+        pool = mp.Pool(
+            processes, initializer = init_knockout_worker,
+            initargs = (cobra_net,)
+        )
     # assign reaction fluxes to everything before starting the loop
-    solution = cobra_net.optimize()
-    bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
+    cobra_net.solver.optimize()
+    fluxes = get_flux_array(cobra_net, flux_vars)
     while True:
-        # remove all non-boundary reactions with no flux
-        no_flux_rxn_ids = solution.fluxes[solution.fluxes == 0].index
-        boundary_rxn_ids = [rxn.id for rxn in cobra_net.boundary]
-        ids_to_remove = [
-            rxn for rxn in no_flux_rxn_ids if rxn not in boundary_rxn_ids
-        ]
-        rxns_to_remove = [
-            cobra_net.reactions.get_by_id(rxn_id) for rxn_id in ids_to_remove
-        ]
-        cobra_net.remove_reactions(rxns_to_remove)
-        # get biomass fluxes for all single reaction knockouts
-        kos = get_kos(cobra_net, processes = 1)
-        # make sure we don't drop a boundary reaction (takes several steps
-        # because the index of kos is a bunch of frozensets of reaction ids)
-        kos['rxn'] = kos.index
-        kos['rxn'] = kos['rxn'].apply(lambda x: list(x)[0])
-        kos = kos[~kos['rxn'].isin(boundary_rxn_ids)]
-        if kos.empty:
-            print('KO dataframe was emtpy after trying to remove exchange rxns')
-            print(get_kos(cobra_net))
-            print(boundary_rxn_ids)
-            sys.exit()
+        # knock out all non-boundary reactions with no flux (tiny fluxes
+        # count as none; see min_flux_knockouts)
+        no_flux = np.abs(fluxes) < 10e-10
+        for i in np.flatnonzero(no_flux & ~boundary & ~knocked):
+            rxns[i].bounds = (0, 0)
+            knocked[i] = True
+        # get biomass fluxes for all single knockouts of the non-boundary
+        # reactions that haven't been knocked out yet (knocking out a reaction
+        # that's already been knocked out obviously does nothing); every one
+        # of them carries flux, since the ones that didn't were just knocked
+        # out, so knockout_growths' shortcut for reactions with no flux never
+        # applies here and each of them costs an LP every round
+        active = np.flatnonzero(~knocked & ~boundary)
+        if len(active) == 0:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            raise ValueError(
+                'No reactions left to knock out besides exchange reactions: ' +
+                ', '.join(sorted(rxns[i].id for i in np.flatnonzero(boundary)))
+            )
+        # knockouts we already know stop biomass production don't need to be
+        # solved (and count as having no solution)
+        if context is not None:
+            bits = make_bits(~knocked)
+            dead_ends = np.array([
+                i != bm_index and abs(fluxes[i]) >= 10e-10 and
+                cached_feasibility(context, bits & ~(1 << int(i))) is False
+                for i in active
+            ], dtype = bool)
+            active = active[~dead_ends]
+        growths = knockout_growths(
+            cobra_net, active, fluxes, fluxes[bm_index],
+            pool = pool, knocked = np.flatnonzero(knocked)
+        )
+        if context is not None:
+            for i in active[np.abs(fluxes[active]) >= 10e-10]:
+                if i != bm_index:
+                    record_feasibility(
+                        context, bits & ~(1 << int(i)), growths[i] >= 10e-10
+                    )
         # now we can identify the reaction with the smallest impact on biomass
-        # flux and drop it
-        min_flux_rxn_id = list(kos['growth'].idxmax())[0]
-        min_flux_rxn = cobra_net.reactions.get_by_id(min_flux_rxn_id)
+        # flux and drop it; lots of knockouts tend to leave growth unchanged,
+        # and which of those comes out on top shouldn't depend on rounding
+        # errors that vary with whatever the solver did last, so anything
+        # within the usual tolerance of the best growth counts as a tie and
+        # the first of them in the model wins
+        best = np.nanmax(growths)
+        min_flux_index = np.flatnonzero(growths >= best - 10e-10)[0]
         # if this reaction is the biomass reaction, we're clearly done pruning
-        if min_flux_rxn.id == bm_rxn.id:
+        if min_flux_index == bm_index:
             break
-        cobra_net.remove_reactions([min_flux_rxn])
-        # see if that made the network unsolvable; if so, add the reaction back
-        # and exit the while loop
-        solution = cobra_net.optimize()
+        min_flux_rxn = rxns[min_flux_index]
+        old_bounds = min_flux_rxn.bounds
+        min_flux_rxn.bounds = (0, 0)
+        # see if that made the network unsolvable; if so, put the reaction's
+        # bounds back and exit the while loop
+        status = cobra_net.solver.optimize()
         # sometimes the solution will be feasible but the flux through the
         # biomass reaction will be some absurdly small number and then if you
         # do FBA on the same network again you won't get a feasible solution
         # so can't just check to see if the flux is 0
-        bm_rxn_flux = solution.fluxes.get(key = bm_rxn.id)
-        if solution.status == 'infeasible' or bm_rxn_flux < 10e-10:
-            cobra_net.add_reaction(min_flux_rxn)
+        if status != 'optimal':
+            min_flux_rxn.bounds = old_bounds
+            break
+        fluxes = get_flux_array(cobra_net, flux_vars)
+        if fluxes[bm_index] < 10e-10:
+            min_flux_rxn.bounds = old_bounds
             break
+        knocked[min_flux_index] = True
+    if pool is not None:
+        pool.close()
+        pool.join()
     # we kept all of the boundary reactions around until now; drop the ones
-    # that have no flux
-    # have to recreate the solution object first since we probably just added
-    # an essential reaction back to the network after discovering that it was
-    # essential
-    solution = cobra_net.optimize()
-    cobra_net.remove_reactions(solution.fluxes[solution.fluxes == 0].index)
-    return(cobra_net)
+    # that have no flux along with everything we knocked out
+    # have to solve again first since we probably just restored an essential
+    # reaction after discovering that it was essential
+    cobra_net.solver.optimize()
+    fluxes = get_flux_array(cobra_net, flux_vars)
+    to_remove = np.flatnonzero((np.abs(fluxes) < 10e-10) | knocked)
+    return({rxns[i].id for i in to_remove} | knocked_out)
+
+def knockout_growths(model, candidates, fluxes, growth, pool = None,
+    knocked = ()):
+    '''
+    Find the value of a COBRApy model's objective (e.g. its growth rate) after
+    knocking out each of the reactions at the positions in candidates, one at
+    a time, given the fluxes (from get_flux_array) and objective value of an
+    optimal solution for the model as it is now
+
+    Knocking out a reaction that has no flux in that solution leaves the
+    solution possible, so those reactions get growth without any FBA; only
+    the flux-carrying ones are knocked out and re-solved (each starting from
+    the last solution). If pool is a Pool made with init_knockout_worker,
+    those solves are split between its workers; knocked has to be the
+    positions of every reaction knocked out of the model since then (the
+    workers can keep up with knockouts but not with reactions being put
+    back)
+
+    Returns an array with one value per reaction in the model, which is NaN
+    for reactions that weren't candidates and for knockouts with no
+    solution
+    '''
+    growths = np.full(len(model.reactions), np.nan)
+    candidates = np.asarray(candidates, dtype = int)
+    no_flux = np.abs(fluxes[candidates]) < 10e-10
+    growths[candidates[no_flux]] = growth
+    to_solve = candidates[~no_flux]
+    if pool is None:
+        growths[to_solve] = score_knockouts(model, to_solve)
+    elif len(to_solve) > 0:
+        # hand out a few reactions at a time so the workers stay busy even if
+        # some knockouts take much longer to solve than others
+        chunks = np.array_split(to_solve, math.ceil(len(to_solve) / 16))
+        knocked = np.asarray(knocked, dtype = int)
+        results = pool.map(
+            score_knockouts_task, [(knocked, chunk) for chunk in chunks]
+        )
+        growths[to_solve] = np.concatenate(results)
+    return(growths)
+
+def score_knockouts(model, rxn_indices):
+    '''
+    Knock out each of the reactions at the given positions in a COBRApy
+    model one at a time and return an array of the objective value after each
+    knockout (NaN if there was no solution), putting each reaction back
+    before moving on to the next
+    '''
+    growths = np.empty(len(rxn_indices))
+    for (j, i) in enumerate(rxn_indices):
+        rxn = model.reactions[i]
+        old_bounds = rxn.bounds
+        rxn.bounds = (0, 0)
+        growths[j] = model.slim_optimize(error_value = np.nan)
+        rxn.bounds = old_bounds
+    return(growths)
+
+# what each knockout_growths worker process needs; filled in by
+# init_knockout_worker
+knockout_state = dict()
+
+def init_knockout_worker(model):
+    '''
+    Get a knockout_growths worker ready with its own copy of the model
+    '''
+    knockout_state['model'] = model
+    knockout_state['knocked'] = set()
+
+def score_knockouts_task(task):
+    '''
+    Catch this worker's copy of the model up on knockouts made since the last
+    task, then score the knockouts of the reactions at the given positions
+    '''
+    (knocked, rxn_indices) = task
+    model = knockout_state['model']
+    for i in knocked:
+        if i not in knockout_state['knocked']:
+            model.reactions[i].bounds = (0, 0)
+            knockout_state['knocked'].add(i)
+    return(score_knockouts(model, rxn_indices))
+
+def fva_prune(cobra_model, bm_rxn = None, processes = 1):
+    '''
+    Like min_flux_prune, but since FBA solutions usually aren't unique, do FVA
+    at every step instead: remove every reaction that can't carry flux in any
+    loop-free flux distribution that maximizes biomass flux, then remove the
+    reaction with the smallest largest possible flux and repeat until that
+    makes biomass flux impossible
+    Plain FVA is followed by CycleFreeFlux-style loop removal (see
+    remove_loops) instead of doing loopless FVA, and after the first round,
+    FVA is only redone for the ends of reactions' flux ranges that could have
+    been affected by the last round of removals. If processes is more than 1,
+    FVA is split between that many worker processes that share one copy of
+    the network (which can't be done from inside another pool's workers);
+    the network that's returned doesn't depend on processes
+    '''
+    return(prune_network(
+        lambda model, bm, knocked_out: fva_knockouts(
+            model, bm, knocked_out, processes
+        ),
+        cobra_model, bm_rxn
+    ))
+
+def fva_knockouts(cobra_net, bm_rxn, knocked_out, processes = 1):
+    '''
+    Figure out which reactions fva_prune would remove from cobra_net, starting
+    with the reactions in knocked_out, and return their ids (cobra_net isn't
+    changed, since all of the FVA is done on a FluxNetwork version of it)
+    '''
+    network = FluxNetwork.from_cobra(cobra_net)
+    knocked = np.array(
+        [rxn in knocked_out for rxn in network.rxn_ids], dtype = bool
+    )
+    network.knock_out(np.flatnonzero(knocked))
+    bm_index = network.rxn_index[bm_rxn.id]
+    context = feasibility_context(cobra_net, bm_rxn)
+    # exchange and biomass fluxes are left alone when removing loops
+    fixed = network.boundary.copy()
+    fixed[bm_index] = True
+    # we'll be changing the lower bound on the biomass reaction to keep FVA
+    # at the optimum, so don't change the array the original bounds are in
+    network.lower_bounds = network.lower_bounds.copy()
+    bm_lower_bound = network.lower_bounds[bm_index]
+    pool = None
+    if processes > 1:
+        shared = SharedNetwork(network)
+        pool = mp.Pool(
+            processes, initializer = init_fva_worker,
+            initargs = (shared, fixed)
+        )
+    # smallest and largest loop-free fluxes we've found for each reaction at
+    # the maximum biomass flux, and which reactions carry flux in the
+    # loop-free solutions each of them came from
+    minimum = np.zeros(len(network.rxn_ids))
+    maximum = np.zeros(len(network.rxn_ids))
+    min_witnesses = [np.zeros(0, dtype = np.int64)] * len(network.rxn_ids)
+    max_witnesses = [np.zeros(0, dtype = np.int64)] * len(network.rxn_ids)
+    def find_max_growth():
+        network.lower_bounds[bm_index] = bm_lower_bound
+        network.set_objective(bm_index)
+        solution = network.optimize()
+        if solution.status != 'optimal':
+            return(0.0)
+        return(solution.objective_value)
+    def do_fva(rxns, maximize, growth):
+        # hold the biomass flux at its maximum and find the largest (where
+        # maximize is True) or smallest flux every reaction in rxns can have
+        network.lower_bounds[bm_index] = growth - 10e-10
+        # every chunk is done on a copy of the network with no solver state,
+        # so which extremes come out of the LPs doesn't depend on which
+        # chunks came before it or which process did it
+        chunks = np.array_split(
+            np.arange(len(rxns)), max(1, math.ceil(len(rxns) / 32))
+        )
+        if pool is None:
+            results = [
+                loopless_fva(
+                    network.copy(), rxns[chunk], maximize[chunk], fixed
+                )
+                for chunk in chunks
+            ]
+        else:
+            results = pool.map(loopless_fva_task, [
+                (network.present, bm_index, network.lower_bounds[bm_index],
+                    rxns[chunk], maximize[chunk])
+                for chunk in chunks
+            ])
+        fluxes = np.concatenate([result[0] for result in results])
+        maximum[rxns[maximize]] = fluxes[maximize]
+        minimum[rxns[~maximize]] = fluxes[~maximize]
+        for (i, up, witness) in zip(
+            rxns, maximize, [witness for result in results for witness in
+                result[1]]
+        ):
+            if up:
+                max_witnesses[i] = witness
+            else:
+                min_witnesses[i] = witness
+    def do_full_fva(growth):
+        rxns = np.flatnonzero(~knocked)
+        do_fva(
+            np.repeat(rxns, 2), np.tile([True, False], len(rxns)), growth
+        )
+    growth = find_max_growth()
+    do_full_fva(growth)
+    while True:
+        # remove all non-boundary reactions that can't carry flux, keeping
+        # everything in the loop-free solutions that maximize biomass flux so
+        # that doing this can't lower the maximum biomass flux
+        largest = np.maximum(np.abs(minimum), np.abs(maximum))
+        no_flux = (largest < 10e-10) | knocked
+        no_flux[max_witnesses[bm_index]] = False
+        no_flux[min_witnesses[bm_index]] = False
+        newly_knocked = np.flatnonzero(no_flux & ~network.boundary & ~knocked)
+        # find remaining reaction with smallest maximum flux and remove it
+        min_flux_index = np.argmin(np.where(no_flux, np.inf, largest))
+        # if this reaction is the biomass reaction, we're clearly done pruning
+        if min_flux_index == bm_index:
+            break
+        network.knock_out(newly_knocked)
+        knocked[newly_knocked] = True
+        network.knock_out(min_flux_index)
+        # see if that made the network unsolvable; if so, put the reaction
+        # back and exit the while loop
+        if cached_feasibility(context, network.present) is False:
+            new_growth = 0.0
+        else:
+            new_growth = find_max_growth()
+            record_feasibility(
+                context, network.present, new_growth >= 10e-10
+            )
+        if new_growth < 10e-10:
+            network.restore(min_flux_index)
+            break
+        knocked[min_flux_index] = True
+        newly_knocked = np.append(newly_knocked, min_flux_index)
+        minimum[knocked] = 0.0
+        maximum[knocked] = 0.0
+        # if the maximum biomass flux went down, every reaction's range could
+        # have changed; if not, the only ends of ranges that could have
+        # changed are the ones whose loop-free solutions depended on a
+        # reaction we just removed, since the rest are all still possible
+        if new_growth < growth - 10e-10:
+            do_full_fva(new_growth)
+        else:
+            removed = np.zeros(len(knocked), dtype = bool)
+            removed[newly_knocked] = True
+            redo_max = [
+                i for i in np.flatnonzero(~knocked)
+                if removed[max_witnesses[i]].any()
+            ]
+            redo_min = [
+                i for i in np.flatnonzero(~knocked)
+                if removed[min_witnesses[i]].any()
+            ]
+            if len(redo_max) + len(redo_min) > 0:
+                do_fva(
+                    np.array(redo_max + redo_min, dtype = np.int64),
+                    np.arange(len(redo_max) + len(redo_min)) < len(redo_max),
+                    new_growth
+                )
+        growth = new_growth
+    if pool is not None:
+        pool.close()
+        pool.join()
+        shared.unlink()
+    # we kept all of the boundary reactions around until now; drop the ones
+    # that can't carry flux along with everything we knocked out
+    largest = np.maximum(np.abs(minimum), np.abs(maximum))
+    no_flux = (largest < 10e-10) | knocked
+    no_flux[max_witnesses[bm_index]] = False
+    no_flux[min_witnesses[bm_index]] = False
+    return(
+        {network.rxn_ids[i] for i in np.flatnonzero(no_flux)} | knocked_out
+    )
+
+def loopless_fva(network, rxns, maximize, fixed):
+    '''
+    Find the largest flux (where maximize is True) or smallest flux (where
+    it's False) each of the reactions at the positions in rxns can have in a
+    FluxNetwork as it is now (so if the objective reaction should be held at
+    its optimum, set its lower bound first) without using loops: do plain FVA
+    and then get rid of the loops in each solution with
+    find_loop_free_extreme (fixed says which reactions remove_loops should
+    leave alone). A reaction can be in rxns twice to get both ends of its
+    range
+    Returns an array of the fluxes and a list with an array for each of them
+    of the positions of the reactions that carry flux in the loop-free
+    solution it came from
+    '''
+    extremes = np.zeros(len(rxns))
+    witnesses = list()
+    for (k, (rxn, up)) in enumerate(zip(rxns, maximize)):
+        witnesses.append(np.zeros(0, dtype = np.int64))
+        # reactions that can only go one way obviously can't have any flux
+        # in the other direction
+        if (up and network.upper_bounds[rxn] <= 0) or \
+            (not up and network.lower_bounds[rxn] >= 0):
+            continue
+        network.set_objective(rxn, maximize = up)
+        solution = network.optimize()
+        # if the reaction has no flux at this extreme, it can't have any
+        # without loops either, and that won't change unless the maximum
+        # biomass flux does, so there's nothing for a witness to show
+        if solution.status != 'optimal' or \
+            abs(solution.fluxes[rxn]) < 10e-10:
+            continue
+        loop_free = find_loop_free_extreme(
+            network, rxn, solution.fluxes, fixed
+        )
+        extremes[k] = loop_free[rxn]
+        witnesses[k] = np.flatnonzero(np.abs(loop_free) >= 10e-10)
+    return((extremes, witnesses))
+
+def find_loop_free_extreme(network, rxn, fluxes, fixed):
+    '''
+    Given fluxes that maximize (or minimize) the flux through the reaction at
+    position rxn in a FluxNetwork, find a loop-free flux distribution where
+    that reaction has as much of that flux as possible, a lot like COBRApy's
+    loopless FVA does: take the loops out with remove_loops, and if that also
+    took away some of the reaction's flux, block the other reactions in loops
+    with it and solve again, until its flux survives remove_loops or there
+    are no more loops to block
+    The reaction's flux in the flux distribution this returns is always
+    possible without loops, but isn't always the most it can have
+    '''
+    def without_loops(fluxes, held):
+        # every solution here came straight from HiGHS, so it's a basic
+        # solution (a vertex), and the reactions that aren't at one of their
+        # bounds are all basic; if that's all of the ones remove_loops could
+        # change, their columns of S are linearly independent, so they can't
+        # make a loop and there's no need to solve an LP to find that out
+        lower_bounds = np.where(network.present, network.lower_bounds, 0.0)
+        upper_bounds = np.where(network.present, network.upper_bounds, 0.0)
+        at_bound = (np.abs(fluxes - lower_bounds) < 10e-10) | \
+            (np.abs(fluxes - upper_bounds) < 10e-10)
+        if not (at_bound & (np.abs(fluxes) >= 10e-10) & ~held).any():
+            return(fluxes)
+        return(remove_loops(network, fluxes, held))
+    loop_free = without_loops(fluxes, fixed)
+    best = loop_free
+    if fixed[rxn]:
+        return(best)
+    # the same as fixed, but also holding this reaction's flux where it is, so
+    # that remove_loops leaves the loops this reaction is part of alone
+    held = fixed.copy()
+    held[rxn] = True
+    blocked = np.zeros(len(fluxes), dtype = bool)
+    while abs(loop_free[rxn] - fluxes[rxn]) >= 10e-10:
+        loopy = without_loops(fluxes, held)
+        new_blocks = (np.abs(loop_free) < 10e-10) & \
+            (np.abs(loopy) >= 10e-10) & ~blocked
+        new_blocks[rxn] = False
+        if not new_blocks.any():
+            break
+        blocked |= new_blocks
+        network.knock_out(np.flatnonzero(blocked))
+        solution = network.optimize()
+        network.restore(np.flatnonzero(blocked))
+        if solution.status != 'optimal' or \
+            abs(solution.fluxes[rxn]) < 10e-10:
+            break
+        fluxes = solution.fluxes
+        loop_free = without_loops(fluxes, fixed)
+        if abs(loop_free[rxn]) > abs(best[rxn]):
+            best = loop_free
+    return(best)
+
+def remove_loops(network, fluxes, fixed):
+    '''
+    Take loops out of a flux distribution for a FluxNetwork the way
+    CycleFreeFlux does: find the flux distribution with the least total flux
+    that has the same flux as the original through every reaction in fixed
+    (e.g. exchange and biomass reactions; a boolean array) and where every
+    other reaction carries at most as much flux as it did originally, in the
+    same direction. Returns the original fluxes if the LP can't be solved
+    With highspy, the LP is a second persistent HiGHS problem kept with the
+    network, where every reaction without flux just has bounds of 0, so each
+    call only changes the bounds and costs that are different from the last
+    one and starts from the last optimal basis
+    '''
+    support = np.flatnonzero(np.abs(fluxes) >= 10e-10)
+    flux = fluxes[support]
+    held = fixed[support]
+    costs = np.zeros(len(fluxes))
+    lower_bounds = np.zeros(len(fluxes))
+    upper_bounds = np.zeros(len(fluxes))
+    costs[support] = np.where(held, 0.0, np.sign(flux))
+    lower_bounds[support] = np.where(held, flux, np.minimum(flux, 0.0))
+    upper_bounds[support] = np.where(held, flux, np.maximum(flux, 0.0))
+    if network.solver == 'highspy':
+        network.loop_highs = network.update_highs(
+            network.loop_highs, network.loop_highs_cols, lower_bounds,
+            upper_bounds, costs
+        )
+        network.loop_highs_cols = (lower_bounds, upper_bounds, costs)
+        network.loop_highs.run()
+        if network.loop_highs.getModelStatus() != \
+            highspy.HighsModelStatus.kOptimal:
+            return(fluxes)
+        return(np.array(network.loop_highs.getSolution().col_value))
+    # only the reactions and metabolites with flux need to be part of the LP
+    S = network.S[:,support]
+    S = S[np.unique(S.indices)].tocsc()
+    result = linprog(
+        costs[support],
+        A_eq = S,
+        b_eq = np.zeros(S.shape[0]),
+        bounds = np.column_stack(
+            [lower_bounds[support], upper_bounds[support]]
+        ),
+        method = 'highs'
+    )
+    if result.status != 0:
+        return(fluxes)
+    loop_free = np.zeros(len(fluxes))
+    loop_free[support] = result.x
+    return(loop_free)
+
+# what each loopless_fva worker process needs; filled in by init_fva_worker
+fva_state = dict()
+
+def init_fva_worker(shared, fixed):
+    '''
+    Get a loopless_fva worker ready with its own FluxNetwork made from a
+    SharedNetwork
+    '''
+    fva_state['network'] = shared.to_flux_network()
+    fva_state['fixed'] = fixed
+
+def loopless_fva_task(task):
+    '''
+    Update this worker's network with which reactions are present and the
+    lower bound on the biomass reaction, then do loopless_fva on a chunk of
+    reactions, with a copy of the network that has no solver state so that
+    the results are the same as they'd be in any other process
+    '''
+    (present, bm_index, bm_lower_bound, rxns, maximize) = task
+    network = fva_state['network']
+    network.present = present.copy()
+    network.lower_bounds[bm_index] = bm_lower_bound
+    return(loopless_fva(network.copy(), rxns, maximize, fva_state['fixed']))
+
+def enumerate_minimal_networks(cobra_model, bm_rxn = None):
+    '''
+    Find every minimal subnetwork of a COBRApy model (or SubNetwork) that can
+    still make biomass, i.e. every network you can get to by removing
+    reactions one at a time without ever making biomass flux impossible until
+    no more reactions can be removed. Returns a list with a list of the ids of
+    the reactions in each one
+
+    Going through every order reactions can be removed in (or even every
+    subnetwork that can still make biomass) is hopeless past tiny networks,
+    so this generates the minimal networks together with the minimal sets of
+    knockouts that make biomass flux impossible (cut sets), which are each
+    other's hitting sets: every cut set contains at least one reaction of
+    every minimal network, and the other way around. It keeps the minimal
+    hitting sets of the minimal networks found so far and tries knocking
+    each one out. If the network can't make biomass anymore, the hitting set
+    is a cut set and never has to be looked at again; if it still can, the
+    network that's left contains a minimal network that hasn't been found
+    yet (since the hitting set has a reaction from every one that has), so
+    find one and update the hitting sets for it. Once every hitting set is a
+    cut set, every minimal network has been found. So every LP either finds
+    a cut set or is part of finding a new minimal network, and the number of
+    LPs depends only on how many of those there are, not on how many ways
+    there are to get to them
+
+    Sets of reactions are rows of boolean matrices, all of the FBA is done on
+    a single FluxNetwork by knocking reactions out and putting them back, and
+    reactions that turn out to be essential (cut sets with one reaction) are
+    never tried when shrinking a network down to a minimal one
+    '''
+    if isinstance(cobra_model, SubNetwork):
+        bm_rxn = cobra_model.bm_id
+        cobra_model = cobra_model.to_cobra()
+    if isinstance(bm_rxn, str):
+        bm_rxn = cobra_model.reactions.get_by_id(bm_rxn)
+    network = FluxNetwork.from_cobra(cobra_model)
+    bm_index = network.rxn_index[bm_rxn.id]
+    network.set_objective(bm_index)
+    rxn_count = len(network.rxn_ids)
+    context = feasibility_context(cobra_model, bm_rxn)
+    def makes_biomass():
+        solution = network.optimize()
+        if solution.status == 'optimal' and solution.objective_value > 10e-10:
+            return(solution)
+        return(None)
+    def can_make_biomass():
+        # same as makes_biomass, but asks the feasibility cache first, for
+        # when we only need to know whether there's a solution
+        feasible = cached_feasibility(context, network.present)
+        if feasible is None:
+            feasible = makes_biomass() is not None
+            record_feasibility(context, network.present, feasible)
+        return(feasible)
+    def find_minimal_network(knocked, essential):
+        # start from the reactions with flux and remove the rest in order of
+        # increasing flux, the way min_flux_prune would, unless that makes
+        # biomass flux impossible; one pass is enough, since a reaction that
+        # couldn't be removed before some others were still can't be after
+        network.present = ~knocked
+        fluxes = makes_biomass().fluxes
+        network.present = np.abs(fluxes) >= 10e-10
+        network.present[bm_index] = True
+        candidates = np.flatnonzero(network.present & ~essential)
+        for rxn in candidates[np.argsort(np.abs(fluxes[candidates]))]:
+            network.knock_out(rxn)
+            if not can_make_biomass():
+                network.restore(rxn)
+        return(network.present.copy())
+    network.present[:] = True
+    if makes_biomass() is None:
+        return(list())
+    essential = np.zeros(rxn_count, dtype = bool)
+    essential[bm_index] = True
+    # one row per minimal network found so far
+    minimal = find_minimal_network(
+        np.zeros(rxn_count, dtype = bool), essential
+    ).reshape(1, -1)
+    # minimal hitting sets of the minimal networks found so far that haven't
+    # been tried yet, starting with each reaction of the first one (the ones
+    # that turn out to be cut sets are dropped, since cut sets hit every
+    # network found after them too)
+    to_try = np.eye(rxn_count, dtype = bool)[minimal[0]]
+    while len(to_try) > 0:
+        knocked = to_try[-1]
+        to_try = to_try[:-1]
+        if (knocked & essential).any():
+            # a hitting set with an essential reaction in it is just that
+            # reaction, which we already know is a cut set
+            continue
+        network.present = ~knocked
+        if not can_make_biomass():
+            if knocked.sum() == 1:
+                essential |= knocked
+            continue
+        new_network = find_minimal_network(knocked, essential)
+        minimal = np.vstack([minimal, new_network])
+        # this hitting set and any others that miss the new network are
+        # replaced by each of them plus one of its reactions, keeping only
+        # the minimal ones
+        hits = to_try[:,new_network].any(axis = 1)
+        misses = np.vstack([to_try[~hits], knocked])
+        to_try = [to_try[hits]]
+        # (float32 so the matrix product is done with BLAS)
+        overlaps = misses.astype(np.float32) @ minimal.T.astype(np.float32)
+        for (miss, overlap) in zip(misses, overlaps):
+            # a set is a minimal hitting set if every reaction in it is the
+            # only one it has from some network, so adding a reaction that's
+            # in every network one of this set's reactions is the only one
+            # from would make that reaction unnecessary (and adding the same
+            # reaction to two different sets can't give the same minimal one)
+            private = minimal[overlap == 1]
+            unusable = np.zeros(rxn_count, dtype = bool)
+            for rxn in np.flatnonzero(miss):
+                unusable |= private[private[:,rxn]].all(axis = 0)
+            rxns = np.flatnonzero(new_network & ~unusable)
+            grown = np.repeat(miss.reshape(1, -1), len(rxns), axis = 0)
+            grown[np.arange(len(rxns)), rxns] = True
+            to_try.append(grown)
+        to_try = np.vstack(to_try)
+    network.present[:] = True
+    return([
+        [network.rxn_ids[i] for i in np.flatnonzero(row)] for row in minimal
+    ])
+
+def milp_prune(cobra_model, bm_rxn = None, time_limit = 60, stats = None):
+    '''
+    Remove as many reactions from the network as possible while it can still
+    make biomass, by solving a single MILP for the smallest subnetwork instead
+    of removing reactions one at a time (see find_smallest_networks). If the
+    MILP can't be solved within time_limit seconds (or highspy isn't
+    installed), falls back to min_flux_prune, starting from the best network
+    the MILP found in time if there was one
+    If stats is a dict, how the MILP ended is put in it ('milp_status'):
+    'optimal' if it found the smallest network, 'time_limit', 'no_growth' or
+    'failed' (see find_smallest_networks) if min_flux_prune had to finish the
+    job, or 'no_highspy'
+    '''
+    return(prune_network(
+        lambda model, bm, knocked_out: milp_knockouts(
+            model, bm, knocked_out, time_limit, stats
+        ),
+        cobra_model, bm_rxn
+    ))
+
+def milp_knockouts(cobra_net, bm_rxn, knocked_out, time_limit = 60,
+    stats = None):
+    '''
+    Figure out which reactions milp_prune would remove from cobra_net,
+    starting with the reactions in knocked_out, and return their ids
+    (cobra_net is only changed if it has to fall back to min_flux_knockouts)
+    '''
+    status = 'no_highspy'
+    smallest = list()
+    if highspy is not None:
+        network = FluxNetwork.from_cobra(cobra_net)
+        knocked = np.array(
+            [rxn in knocked_out for rxn in network.rxn_ids], dtype = bool
+        )
+        network.knock_out(np.flatnonzero(knocked))
+        bm_index = network.rxn_index[bm_rxn.id]
+        (smallest, best, status) = find_smallest_networks(
+            network, bm_index, 1, time_limit
+        )
+        # if we ran out of time, at least don't make min_flux_prune start
+        # over from the whole network
+        if best is not None:
+            for i in np.flatnonzero(~best & ~knocked):
+                cobra_net.reactions[i].bounds = (0, 0)
+            knocked_out = {network.rxn_ids[i] for i in np.flatnonzero(~best)}
+    if stats is not None:
+        stats['milp_status'] = status
+    if len(smallest) > 0:
+        return({network.rxn_ids[i] for i in np.flatnonzero(~smallest[0])})
+    return(min_flux_knockouts(cobra_net, bm_rxn, knocked_out))
+
+def smallest_networks(cobra_model, bm_rxn = None, count = 1,
+    time_limit = 60):
+    '''
+    Find the subnetwork of a COBRApy model (or SubNetwork) with the fewest
+    reactions that can still make biomass, then the next smallest that
+    doesn't contain every reaction of one already found, and so on until
+    count networks have been found (see find_smallest_networks). Returns a
+    list with a list of the ids of the reactions in each one, smallest first;
+    there can be fewer than count of them if there aren't that many minimal
+    networks or time_limit seconds ran out first
+    '''
+    if isinstance(cobra_model, SubNetwork):
+        bm_rxn = cobra_model.bm_id
+        cobra_model = cobra_model.to_cobra()
+    network = FluxNetwork.from_cobra(cobra_model)
+    bm_index = network.rxn_index[
+        bm_rxn if isinstance(bm_rxn, str) else bm_rxn.id
+    ]
+    (smallest, _, _) = find_smallest_networks(
+        network, bm_index, count, time_limit
+    )
+    return([
+        [network.rxn_ids[i] for i in np.flatnonzero(present)]
+        for present in smallest
+    ])
+
+def find_smallest_networks(network, bm_index, count = 1, time_limit = 60):
+    '''
+    Find up to count of the smallest networks made of the reactions present
+    in a FluxNetwork that can make biomass, by solving a MILP with HiGHS:
+    every reaction gets a binary variable z that has to be 1 for it to carry
+    flux (min flux * z <= flux <= max flux * z, with each reaction's own
+    least and most flux from FVA as its big-Ms), and the sum of the zs is
+    minimized while there's biomass flux. Every network found is then cut
+    out of the MILP by requiring at least one of its reactions to be off, so
+    the next solve finds the smallest network that isn't a superset of any
+    we've found (all of which are minimal, i.e. no reaction can be removed
+    from any of them)
+
+    Reactions FVA says can't carry flux are left out of the MILP, and fluxes
+    are scaled so the biggest big-M is 1. Any network that makes some
+    biomass can make any smaller amount, so the biomass flux only has to be
+    big enough that HiGHS can tell it apart from 0: 100 times its MIP
+    feasibility tolerance, times the most flux the biomass reaction can
+    carry. Each network the MILP finds is still checked with an LP, since a
+    binary variable that's within the solver's tolerance of 0 can let a
+    little flux through; networks that fail the check are cut out and the
+    MILP is solved again
+
+    Returns a list of boolean arrays saying which reactions are in each
+    network (smallest first), the best network the MILP had found when
+    time_limit seconds ran out if that happened before it could prove it was
+    the smallest remaining one (None otherwise), and how the search ended:
+    'optimal' if it found count networks or every minimal network there is,
+    'time_limit' if time ran out, 'no_growth' if the network can't make
+    biomass at all or 'failed' if HiGHS stopped for any other reason
+    '''
+    if highspy is None:
+        raise ImportError('find_smallest_networks needs highspy')
+    start = time.time()
+    present = network.present.copy()
+    network.set_objective(bm_index)
+    solution = network.optimize()
+    if solution.status != 'optimal' or solution.objective_value < 10e-10:
+        return(list(), None, 'no_growth')
+    # FVA: the least and most flux each reaction can carry are its big-Ms,
+    # which are usually much tighter than its bounds
+    min_fluxes = np.zeros(len(present))
+    max_fluxes = np.zeros(len(present))
+    for i in np.flatnonzero(present):
+        network.set_objective(i, maximize = False)
+        min_fluxes[i] = min(network.optimize().objective_value, 0.0)
+        network.set_objective(i)
+        max_fluxes[i] = max(network.optimize().objective_value, 0.0)
+    network.set_objective(bm_index)
+    # only the reactions that can carry flux and the metabolites they
+    # involve are part of the MILP
+    cols = np.flatnonzero(
+        present & ((min_fluxes < -10e-10) | (max_fluxes > 10e-10))
+    )
+    col_count = len(cols)
+    scale = max(-min_fluxes[cols].min(), max_fluxes[cols].max())
+    S = network.S[:,cols]
+    S = S[np.unique(S.indices)].tocsc()
+    lower_bounds = min_fluxes[cols] / scale
+    upper_bounds = max_fluxes[cols] / scale
+    bm = np.flatnonzero(cols == bm_index)[0]
+    # the first col_count columns are fluxes and the rest are the zs; rows
+    # are steady state for every metabolite, then flux - max flux * z <= 0
+    # and flux - min flux * z >= 0 for every reaction
+    I = sparse.identity(col_count)
+    A = sparse.bmat([
+        [S, None],
+        [I, -sparse.diags(upper_bounds)],
+        [I, -sparse.diags(lower_bounds)]
+    ]).tocsc()
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    col_lower = np.concatenate([lower_bounds, np.zeros(col_count)])
+    col_upper = np.concatenate([upper_bounds, np.ones(col_count)])
+    # HiGHS rarely finishes in time if it has to look for less biomass flux
+    # than this
+    col_lower[bm] = max(
+        col_lower[bm],
+        100 * highs.getOptions().mip_feasibility_tolerance * upper_bounds[bm]
+    )
+    col_lower[col_count + bm] = 1.0
+    lp = highspy.HighsLp()
+    lp.num_col_ = 2 * col_count
+    lp.num_row_ = A.shape[0]
+    lp.col_cost_ = np.concatenate([np.zeros(col_count), np.ones(col_count)])
+    lp.col_lower_ = col_lower
+    lp.col_upper_ = col_upper
+    lp.row_lower_ = np.concatenate([
+        np.zeros(S.shape[0]), np.full(col_count, -highspy.kHighsInf),
+        np.zeros(col_count)
+    ])
+    lp.row_upper_ = np.concatenate([
+        np.zeros(S.shape[0]), np.zeros(col_count),
+        np.full(col_count, highspy.kHighsInf)
+    ])
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    lp.integrality_ = [highspy.HighsVarType.kContinuous] * col_count + \
+        [highspy.HighsVarType.kInteger] * col_count
+    highs.passModel(lp)
+    smallest = list()
+    best = None
+    status = 'optimal'
+    while len(smallest) < count:
+        time_left = time_limit - (time.time() - start)
+        if time_left <= 0:
+            status = 'time_limit'
+            break
+        highs.setOptionValue('time_limit', time_left)
+        highs.run()
+        model_status = highs.getModelStatus()
+        if model_status == highspy.HighsModelStatus.kInfeasible:
+            # every minimal network has been found
+            break
+        has_solution = highs.getInfo().primal_solution_status == \
+            highspy.SolutionStatus.kSolutionStatusFeasible
+        if not has_solution:
+            if model_status == highspy.HighsModelStatus.kTimeLimit:
+                status = 'time_limit'
+            else:
+                status = 'failed'
+            break
+        on = np.array(highs.getSolution().col_value[col_count:]) > 0.5
+        network.present = np.zeros(len(present), dtype = bool)
+        network.present[cols[on]] = True
+        solution = network.optimize()
+        network.present = present.copy()
+        if solution.status != 'optimal' or solution.objective_value < 10e-10:
+            # no subnetwork of this one can make biomass either, so at least
+            # one reaction that isn't in it has to be on
+            off = np.flatnonzero(~on)
+            highs.addRow(
+                1.0, highspy.kHighsInf, len(off), col_count + off,
+                np.ones(len(off))
+            )
+            continue
+        mask = np.zeros(len(present), dtype = bool)
+        mask[cols[on]] = True
+        if model_status != highspy.HighsModelStatus.kOptimal:
+            # ran out of time before proving there's no smaller network
+            best = mask
+            if model_status == highspy.HighsModelStatus.kTimeLimit:
+                status = 'time_limit'
+            else:
+                status = 'failed'
+            break
+        smallest.append(mask)
+        # at least one of this network's reactions has to be off from now on
+        on = np.flatnonzero(on)
+        highs.addRow(
+            -highspy.kHighsInf, len(on) - 1, len(on), col_count + on,
+            np.ones(len(on))
+        )
+    return(smallest, best, status)
+
+def sparse_fba_prune(cobra_model, bm_rxn = None, max_iterations = 20):
+    '''
+    Remove reactions from the network by finding a flux distribution that
+    makes biomass with as few reactions as possible in a handful of LPs (see
+    sparse_fluxes), removing every reaction (besides boundary reactions)
+    without flux in it, then finishing up with min_flux_prune, which usually
+    only has a few reactions left to try
+    '''
+    return(prune_network(
+        lambda model, bm, knocked_out: sparse_fba_knockouts(
+            model, bm, knocked_out, max_iterations
+        ),
+        cobra_model, bm_rxn
+    ))
+
+def sparse_fba_knockouts(cobra_net, bm_rxn, knocked_out, max_iterations = 20):
+    '''
+    Knock reactions out of cobra_net the way sparse_fba_prune does, starting
+    with the reactions in knocked_out, and return the ids of every reaction
+    that should be removed from it
+    '''
+    network = FluxNetwork.from_cobra(cobra_net)
+    knocked = np.array(
+        [rxn in knocked_out for rxn in network.rxn_ids], dtype = bool
+    )
+    network.knock_out(np.flatnonzero(knocked))
+    fluxes = sparse_fluxes(
+        network, network.rxn_index[bm_rxn.id], max_iterations
+    )
+    if fluxes is not None:
+        # knock the reactions with no flux out of the COBRApy model too, so
+        # min_flux_knockouts only has the sparse network's reactions to try
+        knocked_out = set(knocked_out)
+        no_flux = np.abs(fluxes) < 10e-10
+        for i in np.flatnonzero(no_flux & ~network.boundary & ~knocked):
+            cobra_net.reactions[i].bounds = (0, 0)
+            knocked_out.add(network.rxn_ids[i])
+    return(min_flux_knockouts(cobra_net, bm_rxn, knocked_out))
+
+def sparse_fluxes(network, bm_index, max_iterations = 20):
+    '''
+    Find a flux distribution for the reactions present in a FluxNetwork that
+    makes biomass (at 1% of the maximum biomass flux) with as few reactions
+    carrying flux as possible, by iteratively reweighted L1 minimization:
+    start by minimizing total flux (like pFBA), then keep minimizing total
+    flux with every reaction's flux weighted by eps / (eps + |its last flux|),
+    so reactions with little flux get pushed towards none and reactions with
+    lots of it get cheaper to use. Stops once the set of reactions with flux
+    stops changing or after max_iterations LPs; usually takes 5-20
+
+    Fluxes through reversible reactions are split into a forward and a
+    backward part so that their absolute values can be minimized in an LP.
+    Returns an array of fluxes for every reaction in the network, or None if
+    it can't make biomass at all
+    '''
+    network.set_objective(bm_index)
+    solution = network.optimize()
+    if solution.status != 'optimal' or solution.objective_value < 10e-10:
+        return(None)
+    # the growth rate doesn't matter much, since any flux distribution that
+    # makes biomass can be scaled down, so ask for a small one and let the
+    # bounds stay out of the way
+    growth = solution.objective_value / 100
+    eps = growth / 1000
+    cols = np.flatnonzero(network.present)
+    col_count = len(cols)
+    S = network.S[:,cols]
+    S = S[np.unique(S.indices)].tocsc()
+    lower_bounds = network.lower_bounds[cols]
+    upper_bounds = network.upper_bounds[cols]
+    bm = np.flatnonzero(cols == bm_index)[0]
+    # first col_count columns are forward fluxes, the rest are backward fluxes
+    A = sparse.hstack([S, -S]).tocsc()
+    col_lower = np.concatenate(
+        [np.maximum(lower_bounds, 0.0), np.maximum(-upper_bounds, 0.0)]
+    )
+    col_upper = np.concatenate(
+        [np.maximum(upper_bounds, 0.0), np.maximum(-lower_bounds, 0.0)]
+    )
+    col_lower[bm] = max(col_lower[bm], growth)
+    weights = np.ones(col_count)
+    weights[bm] = 0.0
+    highs = None
+    if network.solver == 'highspy':
+        # keep one problem around and only change the costs, so every LP
+        # after the first starts from the last one's solution
+        lp = highspy.HighsLp()
+        lp.num_col_ = 2 * col_count
+        lp.num_row_ = S.shape[0]
+        lp.col_cost_ = np.concatenate([weights, weights])
+        lp.col_lower_ = col_lower
+        lp.col_upper_ = col_upper
+        lp.row_lower_ = np.zeros(S.shape[0])
+        lp.row_upper_ = np.zeros(S.shape[0])
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        highs = highspy.Highs()
+        highs.setOptionValue('output_flag', False)
+        highs.passModel(lp)
+    fluxes = solution.fluxes
+    support = None
+    for _ in range(max_iterations):
+        costs = np.concatenate([weights, weights])
+        if highs is not None:
+            highs.changeColsCost(
+                2 * col_count, np.arange(2 * col_count), costs
+            )
+            highs.run()
+            if highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+                break
+            x = np.array(highs.getSolution().col_value)
+        else:
+            result = linprog(
+                costs,
+                A_eq = A,
+                b_eq = np.zeros(S.shape[0]),
+                bounds = np.column_stack([col_lower, col_upper]),
+                method = 'highs'
+            )
+            if result.status != 0:
+                break
+            x = result.x
+        flux = x[:col_count] - x[col_count:]
+        fluxes = np.zeros(len(network.rxn_ids))
+        fluxes[cols] = flux
+        new_support = np.abs(flux) >= 10e-10
+        if support is not None and (new_support == support).all():
+            break
+        support = new_support
+        weights = eps / (eps + np.abs(flux))
+        weights[bm] = 0.0
+    return(fluxes)
+
+def derive_seed(seed, *key):
+    '''
+    Make a 64-bit random seed out of a seed and a key (e.g. which biomass
+    reaction and which environment a task is for), so that every task gets the
+    same seed however many other tasks there are, which order they're done in
+    and whether some of them were done by an earlier run
+    '''
+    digest = hashlib.sha256(repr((seed,) + key).encode()).digest()
+    return(int.from_bytes(digest[:8], 'little'))
+
+class TaskLedger():
+    # keeps track of which tasks of a long run are finished so that a run
+    # that's restarted doesn't do them again
+    def __init__(self, path):
+        '''
+        A record of which tasks (tuples of ints, strings, etc.) of a run are
+        done and which chunk of a ResultStore their rows went into, kept as
+        lines of JSON in the file at path (which is read if it already
+        exists). The first line is the config of the run (a dict), so that a
+        rerun can tell whether it's continuing the same run
+
+        Each batch of tasks is recorded after the chunk with their rows is
+        written, so if a run dies in between, the chunk is there but its
+        tasks aren't (see orphan_chunks) and they just get done again
+        '''
+        self.path = path
+        self.config = None
+        # task -> number of rows it made
+        self.done = dict()
+        self.chunks = set()
+        if os.path.exists(path):
+            with open(path, 'rb+') as ledger_file:
+                for line in iter(ledger_file.readline, b''):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # a line that didn't get finished before a crash; cut
+                        # it off so new lines don't get stuck onto it
+                        ledger_file.truncate(ledger_file.tell() - len(line))
+                        break
+                    if 'config' in entry:
+                        self.config = entry['config']
+                        continue
+                    if entry['chunk'] is not None:
+                        self.chunks.add(entry['chunk'])
+                    for (task, rows) in entry['tasks']:
+                        self.done[tuple(task)] = rows
+
+    def __contains__(self, task):
+        return(tuple(task) in self.done)
+
+    def __len__(self):
+        return(len(self.done))
+
+    def write(self, entry):
+        # make sure every line is really on disk before moving on, so the
+        # ledger never says a task is done when it might not be
+        with open(self.path, 'a') as ledger_file:
+            ledger_file.write(json.dumps(entry) + '\n')
+            ledger_file.flush()
+            os.fsync(ledger_file.fileno())
+
+    def start(self, config):
+        '''
+        Start a new ledger (forgetting any tasks already in it) for a run with
+        the given config
+        '''
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.config = config
+        self.done = dict()
+        self.chunks = set()
+        self.write({'config': config})
+
+    def record(self, tasks, chunk = None):
+        '''
+        Record that each task in tasks (a list of (task, number of rows it
+        made) pairs) is done and that their rows are in chunk (the path
+        ResultStore.flush returned, or None if they didn't make any rows)
+        '''
+        if len(tasks) == 0:
+            return
+        if chunk is not None:
+            chunk = os.path.basename(chunk)
+            self.chunks.add(chunk)
+        for (task, rows) in tasks:
+            self.done[tuple(task)] = rows
+        self.write({
+            'chunk': chunk,
+            'tasks': [[list(task), rows] for (task, rows) in tasks]
+        })
+
+    def orphan_chunks(self, store_path):
+        '''
+        List the chunks in a ResultStore directory whose tasks never made it
+        into the ledger
+        '''
+        return([
+            chunk for chunk in get_chunk_files(store_path)
+            if os.path.basename(chunk) not in self.chunks
+        ])
+
+def resume_ledger(path, config, resume = True):
+    '''
+    Open the TaskLedger at path for a run with the given config (a dict),
+    continuing the run already recorded there if resume is True and it had
+    the same config, and starting over otherwise. If config['seed'] is None
+    (i.e. the run is meant to be random), the seed of the run being continued
+    is used, or a new one is chosen and recorded so that the run can still be
+    continued. Returns the ledger and whether it's continuing an earlier run
+    '''
+    config = dict(config)
+    ledger = TaskLedger(path)
+    if resume and ledger.config is not None:
+        if config['seed'] is None:
+            config['seed'] = ledger.config['seed']
+        if json.loads(json.dumps(config)) == ledger.config:
+            return((ledger, True))
+    if config['seed'] is None:
+        config['seed'] = random.getrandbits(64)
+    ledger.start(config)
+    return((ledger, False))
+
+def pruner_key(pruner):
+    '''
+    Make a string that says which pruner (e.g. min_flux_prune, or
+    functools.partial(min_flux_prune, block_size = 16)) a run used and that
+    comes out the same every time the same pruner is used, for telling
+    whether a run can be continued. Raises a ValueError for pruners it can't
+    do that for, like lambdas and functions defined inside other functions,
+    whose names don't say what they do, and partials of objects whose reprs
+    include memory addresses
+    '''
+    if isinstance(pruner, functools.partial):
+        args = [repr(arg) for arg in pruner.args] + [
+            f'{name} = {value!r}'
+            for (name, value) in sorted(pruner.keywords.items())
+        ]
+        key = f'{pruner_key(pruner.func)}({", ".join(args)})'
+        if re.search(r' at 0x[0-9a-f]+', key):
+            raise ValueError(
+                f'Arguments of {key} include objects without a stable repr'
+            )
+        return(key)
+    name = getattr(pruner, '__qualname__', None)
+    if name is None or '<' in name:
+        raise ValueError(
+            f'Can\'t tell whether runs of {pruner!r} can be continued; ' +
+            'use a function defined at the top level of a module or a ' +
+            'functools.partial of one'
+        )
+    # functions in this module keep the plain names earlier versions used
+    module = getattr(pruner, '__module__', __name__)
+    return(name if module == __name__ else f'{module}.{name}')
+
+# pruning functions the sweep scripts can choose between by name
+# (milp_prune isn't one of them since its MILP still often runs out of time
+# on (ab,5) networks, which makes a sweep of it mostly min_flux_prune)
+pruners = {
+    'min': min_flux_prune,
+    'random': random_prune,
+    'bm': bm_impact_prune,
+    'fva': fva_prune,
+    'sparse': sparse_fba_prune
+}
+
+# describes a universal network for run_sweep (and load_network)
+NetworkSpec = namedtuple(
+    'NetworkSpec', ['monos', 'max_len', 'no_mirrors', 'allow_export'],
+    defaults = [False, True]
+)
+
+# what each run_sweep worker process needs to prune; filled in by
+# init_sweep_worker so that it only has to be sent to each process once
+sweep_state = dict()
+
+def init_sweep_worker(pruner, universal, bms):
+    '''
+    Get a run_sweep worker ready: remember which pruning function to use and
+    the list of biomass reactions (as dicts of metabolite ids and
+    coefficients) that tasks refer to by index, and get the universal
+    COBRApy model. universal is either a COBRApy model or a NetworkSpec, in
+    which case this process loads its own copy of the model from
+    load_network's cache (which the process that made the pool has already
+    filled), so the model never has to be sent to it and is exactly the one
+    a sweep run in a single process prunes
+    '''
+    if isinstance(universal, NetworkSpec):
+        (SCN, universal) = load_network(*universal)
+    sweep_state['met_ids'] = [met.id for met in universal.metabolites]
+    sweep_state['universal'] = universal
+    # sorting the universal network's reaction ids for reaction-inclusion
+    # vectors only has to happen once
+    sweep_state['rxn_index'] = ReactionIndex(universal)
+    sweep_state['pruner'] = pruner
+    # pruners that can report on themselves (like milp_prune's milp_status)
+    # get a stats dict for every task
+    sweep_state['stats'] = 'stats' in inspect.signature(pruner).parameters
+    sweep_state['bms'] = bms
+
+def run_sweep_task(task):
+    '''
+    Prune the universal network for one biomass reaction and one environment
+    and return the row of output for it, or None if the environment turns out
+    to be unable to make the biomass (only checked if check is True). Tasks
+    are just the index of the biomass reaction, which of its environments
+    this is, the indices of the input metabolites, a random seed and whether
+    to check the environment first
+    '''
+    (plan, draw, env, task_seed, check) = task
+    universal = sweep_state['universal']
+    bm = sweep_state['bms'][plan]
+    env = [sweep_state['met_ids'][met] for met in env]
+    # start every task from the same basis to make results independent of
+    # what else a process has solved (see reset_basis)
+    reset_basis(universal)
+    full_net = SubNetwork(universal, bm = bm, inputs = env)
+    if check:
+        solution = full_net.optimize()
+        # can't just check solution.status because sometimes it's feasible
+        # but the flux through the biomass reaction is vanishingly small
+        if solution.status != 'optimal' or \
+            solution.objective_value < 10e-10:
+            return((plan, draw, None))
+    # every task gets its own seed so that pruners that make random choices
+    # give the same results no matter which process runs the task or when
+    random.seed(task_seed)
+    stats = dict()
+    if sweep_state['stats']:
+        pruned_net = sweep_state['pruner'](full_net, stats = stats)
+    else:
+        pruned_net = sweep_state['pruner'](full_net)
+    growth = pruned_net.optimize().objective_value
+    # the full network also has this task's input and biomass reactions
+    rxn_index = sweep_state['rxn_index'].with_ids(
+        ['->' + met for met in env] + [full_net.bm_id]
+    )
+    row = {
+        'biomass': '-'.join(bm.keys()),
+        'env': '-'.join(env),
+        'rxn_incl': make_rxn_incl(rxn_index, pruned_net),
+        'growth': growth
+    }
+    # anything the pruner put in stats gets its own column
+    row.update(stats)
+    return((plan, draw, row))
+
+def run_sweep(spec, pruner, ins, outs, envs, orgs, seed = None,
+    out_file = 'sweep.parquet', processes = 1, combos = None,
+    save_every = 1000, resume = True):
+    '''
+    Prune the universal network described by spec (a NetworkSpec) with
+    pruner (e.g. min_flux_prune) for orgs randomly chosen biomass reactions
+    with outs precursors each and envs distinct environments with ins inputs
+    each that can make each biomass reaction. If combos is given, each
+    biomass reaction is made combos times with random stoichiometric
+    coefficients between 1 and 10, each with its own envs environments
+
+    Every (biomass reaction, environment) pair is a separate task handed out
+    to a pool of processes as they become free, so one slow prune doesn't hold
+    up everything else, and every worker loads the universal network once
+    instead of having it sent along with every task (from the same
+    load_network cache entry this process uses, so rows don't depend on
+    processes), so tasks are just a few numbers. Rows (biomass, env,
+    rxn_incl, growth, plus a column for everything a pruner with a stats
+    argument puts in it, e.g. solves or milp_status) go into a ResultStore at
+    out_file in the order tasks finish, in chunks of save_every rows (read
+    them with read_sweep), and the tasks in each chunk are recorded in a
+    TaskLedger in the same directory
+
+    Every biomass reaction, environment and task gets its own seed made from
+    seed (with derive_seed), so seed makes everything reproducible, and the
+    first orgs biomass reactions and first envs environments of each are the
+    same whatever orgs and envs are. So if resume is True and out_file has a
+    run with the same spec, pruner (see pruner_key), ins, outs, seed (or
+    seed is None) and combos made with the same version of this module, only the tasks that
+    run didn't finish are done and their rows are added to the ones already
+    there, whether it died partway through or just had smaller orgs or envs.
+    Otherwise anything already in out_file is replaced. Returns the number of
+    pruned networks in out_file for this sweep
+    '''
+    spec = NetworkSpec(*spec)
+    config = {
+        'spec': list(spec),
+        'pruner': pruner_key(pruner),
+        'ins': ins,
+        'outs': outs,
+        'seed': seed,
+        'combos': combos,
+        # rows made by other versions may not be comparable with new ones
+        'version': __version__
+    }
+    os.makedirs(out_file, exist_ok = True)
+    (ledger, resuming) = resume_ledger(
+        os.path.join(out_file, 'ledger.jsonl'), config, resume
+    )
+    seed = ledger.config['seed']
+    if resuming:
+        # chunks written by a run that died before it could record them
+        for chunk in ledger.orphan_chunks(out_file):
+            os.remove(chunk)
+    (SCN, universal) = load_network(*spec)
+    oracle = FeasibilityOracle.from_network(SCN, spec.allow_export)
+    # choose all of the biomass reactions up front and get an environment
+    # sampler ready for each one
+    plans = list()
+    for org in range(orgs):
+        rng = random.Random(derive_seed(seed, 'biomass', org))
+        bm_mets = rng.sample(oracle.met_ids, outs)
+        for combo in range(1 if combos is None else combos):
+            if combos is None:
+                bm = {met: -1.0 for met in bm_mets}
+            else:
+                bm = {met: -float(rng.randint(1, 10)) for met in bm_mets}
+            sampler = EnvironmentSampler(
+                oracle, bm_mets, ins,
+                rng = random.Random(derive_seed(seed, 'envs', org, combo))
+            )
+            plans.append(((org, combo), bm, sampler))
+    done = [0] * len(plans)
+    # how many environments have been drawn for each biomass reaction
+    drawn = [0] * len(plans)
+    bms = [bm for (key, bm, sampler) in plans]
+    if processes > 1:
+        pool = mp.Pool(
+            processes, initializer = init_sweep_worker,
+            initargs = (pruner, spec, bms)
+        )
+        run_tasks = lambda tasks: pool.imap_unordered(run_sweep_task, tasks)
+    else:
+        init_sweep_worker(pruner, universal, bms)
+        run_tasks = lambda tasks: map(run_sweep_task, tasks)
+    # tasks that are done but whose rows haven't been written yet
+    finished = list()
+    # chunks are only written when their tasks can be recorded in the ledger
+    with ResultStore(out_file, None, overwrite = not resuming) as store:
+        # if the samplers can't tell which environments will work on their
+        # own, some tasks will come back empty, so keep drawing replacements
+        # until every biomass reaction has enough environments or has run out
+        while True:
+            tasks = list()
+            for (i, (key, bm, sampler)) in enumerate(plans):
+                needed = envs - done[i]
+                while needed > 0:
+                    env = sampler.draw()
+                    if env is None:
+                        break
+                    draw = drawn[i]
+                    drawn[i] += 1
+                    # environments are always drawn in the same order, so an
+                    # earlier run may have done this one already
+                    if key + (draw,) in ledger:
+                        done[i] += ledger.done[key + (draw,)]
+                        needed -= ledger.done[key + (draw,)]
+                        continue
+                    tasks.append((
+                        i, draw,
+                        [oracle.met_index[met] for met in env],
+                        derive_seed(seed, 'task', *key, draw),
+                        not sampler.exact
+                    ))
+                    needed -= 1
+            if not tasks:
+                break
+            for (i, draw, row) in run_tasks(tasks):
+                if row is not None:
+                    store.append(row)
+                    done[i] += 1
+                finished.append((plans[i][0] + (draw,), int(row is not None)))
+                # write rows and record their tasks every so often so a
+                # sweep that dies partway through loses at most that many
+                if len(finished) >= save_every:
+                    ledger.record(finished, store.flush())
+                    finished = list()
+        ledger.record(finished, store.flush())
+    if processes > 1:
+        pool.close()
+        pool.join()
+    return(sum(done))
+
+class InclusionVector():
+    # a reaction-inclusion vector with 8 reactions packed into every byte
+    # popcounts of every possible byte, for counting reactions
+    byte_counts = np.array([bin(byte).count('1') for byte in range(256)])
+
+    def __init__(self, bits, length = None):
+        '''
+        Which reactions of a universal network are in a subnetwork, stored as
+        an array of bytes made by np.packbits (so the first reaction is the
+        highest bit of the first byte) instead of a string with a '0' or '1'
+        for every reaction, which takes up 8 times as much memory and disk
+        space and is much slower to hash and compare
+
+        bits is either anything np.asarray can turn into an array of booleans
+        or, if length is given, an array of bytes from np.packbits of an array
+        with length booleans in it. Hashing, equality, counting reactions and
+        set operations (&, |, ^, - and ~) all work on the bytes directly, and
+        str gives the old-style string of 0s and 1s
+        '''
+        if length is None:
+            bits = np.asarray(bits, dtype = bool)
+            length = len(bits)
+            bits = np.packbits(bits)
+        self.packed = np.array(bits, dtype = np.uint8)
+        # vectors get used as dict keys, so they can't be allowed to change
+        self.packed.flags.writeable = False
+        self.length = length
+        self.hash = None
+
+    @classmethod
+    def from_string(cls, bitstring):
+        '''
+        Make an InclusionVector out of an old-style string of 0s and 1s (any
+        other characters, like quotes around it, are ignored)
+        '''
+        bitstring = re.sub('[^01]', '', bitstring)
+        return(cls(np.frombuffer(bitstring.encode(), dtype = np.uint8) == 49))
+
+    @staticmethod
+    def stack(vectors):
+        '''
+        Make a matrix of 0s and 1s with one row per InclusionVector (which
+        all have to be the same length) and one column per reaction
+        '''
+        vectors = list(vectors)
+        if len(vectors) == 0:
+            return(np.zeros((0, 0), dtype = np.uint8))
+        packed = np.vstack([vector.packed for vector in vectors])
+        return(np.unpackbits(packed, axis = 1)[:,:vectors[0].length])
+
+    def to_array(self):
+        '''
+        Unpack into an array of booleans with one entry per reaction
+        '''
+        return(np.unpackbits(self.packed)[:self.length].astype(bool))
+
+    def count(self):
+        '''
+        Count the reactions that are in the subnetwork
+        '''
+        return(int(InclusionVector.byte_counts[self.packed].sum()))
+
+    def issubset(self, other):
+        '''
+        See if every reaction in this subnetwork is also in other
+        '''
+        return(not (self - other).packed.any())
+
+    def __len__(self):
+        return(self.length)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError('InclusionVector index out of range')
+        return(int(self.packed[i // 8] >> (7 - i % 8) & 1))
+
+    def __iter__(self):
+        return(iter(np.unpackbits(self.packed)[:self.length].tolist()))
+
+    def __hash__(self):
+        if self.hash is None:
+            self.hash = hash((self.length, self.packed.tobytes()))
+        return(self.hash)
+
+    def __eq__(self, other):
+        if not isinstance(other, InclusionVector):
+            return(NotImplemented)
+        return(
+            self.length == other.length and
+            np.array_equal(self.packed, other.packed)
+        )
+
+    def combine(self, other, op):
+        # apply a bitwise numpy function to the bytes of two vectors of the
+        # same length
+        if not isinstance(other, InclusionVector):
+            return(NotImplemented)
+        if self.length != other.length:
+            raise ValueError(
+                'Can only combine InclusionVectors of the same length, not ' +
+                f'{self.length} and {other.length}'
+            )
+        return(InclusionVector(op(self.packed, other.packed), self.length))
+
+    def __and__(self, other):
+        return(self.combine(other, np.bitwise_and))
+
+    def __or__(self, other):
+        return(self.combine(other, np.bitwise_or))
+
+    def __xor__(self, other):
+        return(self.combine(other, np.bitwise_xor))
+
+    def __sub__(self, other):
+        return(self.combine(other, lambda a, b: a & ~b))
+
+    def __invert__(self):
+        # the padding bits at the end of the last byte have to stay 0 so
+        # that equal vectors always have equal bytes
+        return(InclusionVector(~self.to_array()))
+
+    def __str__(self):
+        chars = np.unpackbits(self.packed)[:self.length] + ord('0')
+        return(chars.tobytes().decode())
+
+    def __repr__(self):
+        return(f'InclusionVector({self.count()} of {self.length} reactions)')
+
+# the order entries of reaction-inclusion vectors are in (the order of the
+# universal network's reactions, see ReactionIndex), which is saved with every
+# file of them; versions of this module before 1.3.0 sorted the reactions by
+# id instead and didn't save anything, so files without it are in that order
+RXN_INCL_ORDER = 'canonical'
+
+class ReactionIndex():
+    # where every reaction of a universal network goes in its
+    # reaction-inclusion vectors
+    def __init__(self, network):
+        '''
+        The ids of every reaction in a network (a COBRApy model, a SubNetwork
+        or just a list of reaction ids) in the order their entries go in
+        reaction-inclusion vectors, which is the order they're in in the
+        network, plus a dict to find each one's position. Networks from
+        CreateNetwork (and the models and FluxNetworks made from them) always
+        have their reactions in the same canonical order, so vectors for
+        networks pruned from the same universal network line up without
+        sorting anything. Make one of these once per universal network and
+        use it for every network pruned from it instead of calling
+        make_rxn_incl on each one, which has to index all of the universal
+        network's reactions every time
+        '''
+        self.rxn_ids = np.array(get_rxn_ids(network), dtype = str)
+        self.positions = {
+            rxn_id: i for (i, rxn_id) in enumerate(self.rxn_ids.tolist())
+        }
+        # positions of reactions added by with_ids
+        self.extra = dict()
+
+    def __len__(self):
+        return(len(self.rxn_ids))
+
+    def with_ids(self, rxn_ids):
+        '''
+        Make a new ReactionIndex that also has the reactions in rxn_ids (e.g.
+        the input and biomass reactions of a SubNetwork of the universal
+        network this index was made from) at the end, without copying the
+        positions of all of the others
+        '''
+        new_ids = [
+            rxn_id for rxn_id in dict.fromkeys(rxn_ids)
+            if rxn_id not in self.positions and rxn_id not in self.extra
+        ]
+        new_index = ReactionIndex.__new__(ReactionIndex)
+        # numpy string arrays have a fixed width, so make room for the new
+        # ids if any of them are longer than the old ones
+        new_index.rxn_ids = np.concatenate([
+            self.rxn_ids, np.array(new_ids, dtype = str)
+        ])
+        new_index.positions = self.positions
+        new_index.extra = dict(self.extra)
+        for (i, rxn_id) in enumerate(new_ids):
+            new_index.extra[rxn_id] = len(self) + i
+        return(new_index)
+
+    def locate(self, rxn_ids):
+        '''
+        Find the position of every reaction id in rxn_ids in this index's
+        reaction-inclusion vectors
+        '''
+        positions = list()
+        for rxn_id in rxn_ids:
+            position = self.positions.get(rxn_id)
+            if position is None:
+                position = self.extra.get(rxn_id)
+            if position is None:
+                raise Exception(
+                    'Could not construct bitstrings because second network ' +
+                    'was not a subnetwork of the full network.\n' +
+                    f'Problematic reaction: {rxn_id}')
+            positions.append(position)
+        return(np.array(positions, dtype = np.int64))
+
+    def matrix(self, networks):
+        '''
+        Make a boolean matrix with a row for each of networks (COBRApy
+        models, SubNetworks or collections of reaction ids) and a column for
+        each reaction in this index saying which reactions are in each one,
+        all in one go
+        '''
+        networks = list(networks)
+        positions = [self.locate(get_rxn_ids(network)) for network in networks]
+        matrix = np.zeros((len(networks), len(self)), dtype = bool)
+        if len(networks) > 0:
+            rows = np.repeat(
+                np.arange(len(networks)), [len(cols) for cols in positions]
+            )
+            matrix[rows, np.concatenate(positions)] = True
+        return(matrix)
+
+    def vectors(self, networks):
+        '''
+        Make an InclusionVector for each of networks, like matrix
+        '''
+        packed = np.packbits(self.matrix(networks), axis = 1)
+        return([InclusionVector(row, len(self)) for row in packed])
+
+    def vector(self, network):
+        '''
+        Make an InclusionVector for one network
+        '''
+        return(self.vectors([network])[0])
+
+    def unsort(self, vectors, extra_ids = ()):
+        '''
+        Put reaction-inclusion vectors made by versions of this module before
+        1.3.0, which had their entries in order of reaction id, into this
+        index's order. extra_ids are the ids of any reactions the vectors have
+        entries for that aren't in this index (e.g. the input and biomass
+        reactions of the environment they came from), which go at the end like
+        with_ids puts them
+        '''
+        index = self.with_ids(extra_ids) if len(extra_ids) > 0 else self
+        matrix = InclusionVector.stack(vectors).astype(bool)
+        if matrix.shape[1] != len(index):
+            raise ValueError(
+                f'Reaction-inclusion vectors have {matrix.shape[1]} entries ' +
+                f'but the network they came from has {len(index)} reactions'
+            )
+        # the entry for the jth reaction by id goes where that reaction is
+        unsorted = np.zeros_like(matrix)
+        unsorted[:,np.argsort(index.rxn_ids, kind = 'stable')] = matrix
+        return([
+            InclusionVector(row, len(index))
+            for row in np.packbits(unsorted, axis = 1)
+        ])
+
+def get_rxn_ids(network):
+    '''
+    Get the ids of every reaction in a COBRApy model or SubNetwork; anything
+    else is assumed to be a collection of reaction ids already
+    '''
+    if isinstance(network, SubNetwork):
+        return(network.rxn_ids)
+    if isinstance(network, cobra.Model):
+        return([rxn.id for rxn in network.reactions])
+    return(list(network))
 
 def make_rxn_incl(full_model, pruned_model):
     '''
     Given two networks where one is a subnetwork (pruned_model) of the other
-    (full_model), make a vector of 1s and 0s where 1s indicate reactions
-    present in both networks. The order of entries corresponds to the order of
-    reactions in full_model, so if you call this several times with different
-    networks pruned from the same full_model, you can directly compare the
-    output vectors
-    '''
-    # make sure the pruned network is actually a subnetwork of the full one
-    for rxn in pruned_model.reactions:
-        if rxn not in full_model.reactions:
-            raise Exception(
-                'Could not construct bitstrings because second network was ' +
-                'not a subnetwork of the full network.\n' +
-                f'Problematic reaction: {rxn.id}')
-    all_reactions = full_model.reactions
-    # make sure the reactions are in the same order so we can directly compare
-    # multiple bitstrings from multiple different networks derived from the
-    # same parent network
-    all_reactions.sort()
-    bits = [1 if rxn in pruned_model.reactions else 0 for rxn in all_reactions]
-    rxn_incl = ''.join([str(bit) for bit in bits])
-    return(rxn_incl)
+    (full_model), make an InclusionVector where 1s indicate reactions present
+    in both networks. Entries are in the order of full_model's reactions, so
+    if you call this several times with different networks pruned from the
+    same full_model (or from networks with the same parameters, since
+    CreateNetwork always puts reactions in the same order), you can directly
+    compare the output vectors. Either network can also be a
+    SubNetwork or a collection of reaction ids, and full_model can be a
+    ReactionIndex, which is much faster if you're doing this over and over
+    with the same full_model (see also make_rxn_incl_matrix)
+    '''
+    if not isinstance(full_model, ReactionIndex):
+        full_model = ReactionIndex(full_model)
+    return(full_model.vector(pruned_model))
+
+def make_rxn_incl_matrix(full_model, pruned_models):
+    '''
+    Like make_rxn_incl for a whole list of pruned networks at once, but
+    returns a boolean matrix with one row per pruned network (use
+    ReactionIndex.vectors to get InclusionVectors instead)
+    '''
+    if not isinstance(full_model, ReactionIndex):
+        full_model = ReactionIndex(full_model)
+    return(full_model.matrix(pruned_models))
+
+def unsort_rxn_incl(data, full_model, columns = ('rxn_incl',)):
+    '''
+    Put the given columns of InclusionVectors in a DataFrame of results written
+    by a version of this module before 1.3.0 (whose reaction-inclusion vectors
+    were in order of reaction id) into the order they're in now, given the
+    universal network they came from (a COBRApy model, SubNetwork, list of
+    reaction ids or ReactionIndex). Vectors that are longer than the network
+    are taken to also have entries for the input and biomass reactions in
+    their row's env and biomass columns, like run_sweep's. Returns a new
+    DataFrame
+    '''
+    if not isinstance(full_model, ReactionIndex):
+        full_model = ReactionIndex(full_model)
+    data = data.copy()
+    for column in columns:
+        # rows with the same extra reactions can all be done at once
+        groups = dict()
+        for (i, vector) in enumerate(data[column]):
+            if len(vector) == len(full_model):
+                extra_ids = ()
+            elif 'env' in data.columns and 'biomass' in data.columns:
+                extra_ids = tuple(
+                    ['->' + met for met in data['env'].iloc[i].split('-')] +
+                    ['+'.join(data['biomass'].iloc[i].split('-')) + '->']
+                )
+            else:
+                raise ValueError(
+                    f'Reaction-inclusion vectors have {len(vector)} ' +
+                    'entries but the network they came from has ' +
+                    f'{len(full_model)} reactions'
+                )
+            groups.setdefault(extra_ids, list()).append(i)
+        vectors = list(data[column])
+        for (extra_ids, rows) in groups.items():
+            unsorted = full_model.unsort(
+                [vectors[i] for i in rows], extra_ids
+            )
+            for (i, vector) in zip(rows, unsorted):
+                vectors[i] = vector
+        data[column] = vectors
+    return(data)
+
+def check_rxn_incl_order(path, order, data, full_model, columns):
+    '''
+    Make sure the InclusionVectors in the given columns of data (read from
+    path, which said they're in order, or None if it didn't say) are in the
+    current order, putting them into it with unsort_rxn_incl if they were
+    written by a version of this module before 1.3.0 and full_model (the
+    universal network they came from) was given
+    '''
+    if len(columns) == 0 or order == RXN_INCL_ORDER:
+        return(data)
+    if order is not None:
+        raise ValueError(
+            f'{path} has reaction-inclusion vectors in an unknown order: ' +
+            order
+        )
+    if full_model is None:
+        raise ValueError(
+            f'{path} has reaction-inclusion vectors in order of reaction id, ' +
+            'as versions of string_chem_net before 1.3.0 wrote them; pass ' +
+            'the universal network they came from as full_model to put them ' +
+            'in the current order'
+        )
+    return(unsort_rxn_incl(data, full_model, columns))
+
+def write_sweep(path, rows):
+    '''
+    Write rows of run_sweep output (biomass, env, rxn_incl, growth; rxn_incl
+    is an InclusionVector) to a compressed npz file with the packed
+    reaction-inclusion vectors as a single matrix of bytes, which takes up a
+    small fraction of the space a CSV of 0s and 1s would. The file is written
+    somewhere else first and then moved to path, so it's never left half
+    written. Read it back with read_sweep
+    '''
+    vectors = [row[2] for row in rows]
+    packed = np.vstack([vector.packed for vector in vectors]) \
+        if len(vectors) > 0 else np.zeros((0, 0), dtype = np.uint8)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as out:
+        np.savez_compressed(
+            out,
+            biomass = np.array([row[0] for row in rows], dtype = str),
+            env = np.array([row[1] for row in rows], dtype = str),
+            rxn_incl = packed,
+            rxn_count = len(vectors[0]) if len(vectors) > 0 else 0,
+            rxn_incl_order = RXN_INCL_ORDER,
+            growth = np.array([row[3] for row in rows], dtype = np.float64)
+        )
+    os.replace(temp_path, path)
+
+def read_sweep(path, full_model = None):
+    '''
+    Read the output of run_sweep into a pandas DataFrame with the columns
+    biomass, env, rxn_incl (InclusionVectors) and growth. Works on the
+    ResultStores run_sweep writes now, on npz files from write_sweep and on
+    the CSVs of 0s and 1s it used to write (or results_to_csv writes). Files
+    written by versions of this module before 1.3.0 have their
+    reaction-inclusion vectors in order of reaction id, so reading one needs
+    the universal network it came from as full_model (see unsort_rxn_incl)
+    '''
+    if os.path.isdir(path):
+        return(read_results(path, full_model = full_model))
+    if path.endswith('.csv'):
+        data = pd.read_csv(path, dtype = {'rxn_incl': str})
+        data['rxn_incl'] = data['rxn_incl'].map(InclusionVector.from_string)
+        order = None
+        if 'rxn_incl_order' in data.columns:
+            order = data['rxn_incl_order'].iloc[0]
+            data = data.drop(columns = 'rxn_incl_order')
+        return(check_rxn_incl_order(
+            path, order, data, full_model, ['rxn_incl']
+        ))
+    with np.load(path) as sweep:
+        rxn_count = int(sweep['rxn_count'])
+        data = pd.DataFrame({
+            'biomass': sweep['biomass'],
+            'env': sweep['env'],
+            'rxn_incl': [
+                InclusionVector(packed, rxn_count)
+                for packed in sweep['rxn_incl']
+            ],
+            'growth': sweep['growth']
+        })
+        order = str(sweep['rxn_incl_order']) \
+            if 'rxn_incl_order' in sweep.files else None
+    return(check_rxn_incl_order(path, order, data, full_model, ['rxn_incl']))
+
+def convert_sweep_csv(csv_path, full_model, out_path = None):
+    '''
+    Convert a CSV written by an older version of run_sweep (with strings of
+    0s and 1s for reaction-inclusion vectors, in order of reaction id) to the
+    ResultStore it writes now, at out_path (or csv_path with .csv replaced by
+    .parquet), or to an npz file if out_path ends in .npz. full_model is the
+    universal network the CSV's networks were pruned from (a COBRApy model,
+    SubNetwork, list of reaction ids or ReactionIndex), which is needed to
+    put the vectors in the current order. Returns the path it was written to
+    '''
+    if out_path is None:
+        out_path = re.sub(r'\.csv$', '', csv_path) + '.parquet'
+    data = read_sweep(csv_path, full_model)
+    if out_path.endswith('.npz'):
+        write_sweep(out_path, list(zip(
+            data['biomass'], data['env'], data['rxn_incl'], data['growth']
+        )))
+    else:
+        with ResultStore(out_path, overwrite = True) as store:
+            store.extend(data)
+    return(out_path)
+
+class ResultStore():
+    # somewhere to put rows of results as they come in without keeping them
+    # all in memory
+    def __init__(self, path, chunk_rows = 1000, overwrite = False):
+        '''
+        An append-only store of rows of results (dicts of column names to
+        values) in a directory of Parquet files: rows are kept in memory until
+        there are chunk_rows of them (or flush or close is called, or a with
+        block using the store ends, even because of an error) and then written
+        out as the next chunk, so memory use stays flat however long a sweep
+        runs and a crash only loses the rows since the last chunk. If
+        chunk_rows is None, chunks are only written when flush or close is
+        called. Read the chunks back with iter_results or read_results
+
+        Chunks are written somewhere else first and then moved into place, so
+        there's never a half-written chunk. Opening an existing store adds new
+        chunks after the ones already there unless overwrite is True, in which
+        case they're deleted first. Columns of InclusionVectors are stored as
+        their packed bytes
+        '''
+        if pyarrow is None:
+            raise ImportError('ResultStore needs pyarrow')
+        self.path = path
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok = True)
+        if overwrite:
+            for chunk in get_chunk_files(path):
+                os.remove(chunk)
+        # number new chunks after the last one already there
+        self.chunk_count = max([
+            int(os.path.basename(chunk)[5:-8]) + 1
+            for chunk in get_chunk_files(path)
+        ], default = 0)
+        self.rows = list()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, row):
+        '''
+        Add one row (a dict of column names to values) to the store
+        '''
+        self.rows.append(row)
+        if self.chunk_rows is not None and len(self.rows) >= self.chunk_rows:
+            self.flush()
+
+    def extend(self, rows):
+        '''
+        Add a batch of rows (a list of dicts or a pandas DataFrame) to the
+        store
+        '''
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.to_dict('records')
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        '''
+        Write every row that hasn't been written yet to a new chunk and return
+        its path (or None if there weren't any rows to write)
+        '''
+        if len(self.rows) == 0:
+            return(None)
+        data = pd.DataFrame(self.rows)
+        # remember how many reactions each column of InclusionVectors has so
+        # they can be unpacked again
+        lengths = dict()
+        for column in data.columns:
+            if isinstance(data[column].iloc[0], InclusionVector):
+                lengths[column] = len(data[column].iloc[0])
+                data[column] = [
+                    vector.packed.tobytes() for vector in data[column]
+                ]
+        table = pyarrow.Table.from_pandas(data, preserve_index = False)
+        metadata = dict(table.schema.metadata or dict())
+        metadata[b'inclusion_vectors'] = json.dumps(lengths).encode()
+        metadata[b'rxn_incl_order'] = RXN_INCL_ORDER.encode()
+        table = table.replace_schema_metadata(metadata)
+        chunk_path = os.path.join(
+            self.path, f'part-{self.chunk_count:05d}.parquet'
+        )
+        pyarrow.parquet.write_table(table, chunk_path + '.tmp')
+        os.replace(chunk_path + '.tmp', chunk_path)
+        self.chunk_count += 1
+        self.rows = list()
+        return(chunk_path)
+
+    def close(self):
+        '''
+        Write out any rows that are still waiting to be written
+        '''
+        self.flush()
+
+def get_chunk_files(path):
+    '''
+    List the chunks in a ResultStore directory in the order they were written
+    '''
+    return([
+        os.path.join(path, name) for name in sorted(os.listdir(path))
+        if name.startswith('part-') and name.endswith('.parquet')
+    ])
+
+def iter_results(path, columns = None, full_model = None):
+    '''
+    Read a ResultStore one chunk at a time, as a pandas DataFrame per chunk
+    (with only the given columns, if columns isn't None), so that results of
+    any size can be gone through without loading all of them at once. Chunks
+    written by versions of this module before 1.3.0 have their
+    reaction-inclusion vectors in order of reaction id, so reading them needs
+    the universal network they came from as full_model (see unsort_rxn_incl)
+    '''
+    for chunk in get_chunk_files(path):
+        schema = pyarrow.parquet.read_schema(chunk)
+        order = schema.metadata.get(b'rxn_incl_order')
+        read_columns = columns
+        if order is None and columns is not None:
+            # unsort_rxn_incl might need the env and biomass columns too
+            read_columns = list(columns) + [
+                column for column in ['env', 'biomass']
+                if column in schema.names and column not in columns
+            ]
+        table = pyarrow.parquet.read_table(chunk, columns = read_columns)
+        lengths = json.loads(schema.metadata[b'inclusion_vectors'])
+        data = table.to_pandas()
+        vector_columns = [
+            column for column in lengths if column in data.columns
+        ]
+        for column in vector_columns:
+            data[column] = [
+                InclusionVector(
+                    np.frombuffer(packed, np.uint8), lengths[column]
+                )
+                for packed in data[column]
+            ]
+        data = check_rxn_incl_order(
+            chunk, None if order is None else order.decode(), data,
+            full_model, vector_columns
+        )
+        if read_columns is not columns:
+            data = data[list(columns)]
+        yield(data)
+
+def read_results(path, columns = None, full_model = None):
+    '''
+    Read every chunk of a ResultStore into a single pandas DataFrame (see
+    iter_results)
+    '''
+    chunks = list(iter_results(path, columns, full_model))
+    if len(chunks) == 0:
+        return(pd.DataFrame(columns = columns))
+    return(pd.concat(chunks, ignore_index = True))
+
+def results_to_csv(path, csv_path, full_model = None):
+    '''
+    Write a ResultStore out to a CSV one chunk at a time (InclusionVectors are
+    written as strings of 0s and 1s, with a rxn_incl_order column so
+    read_sweep knows what order they're in), e.g. for scripts in R
+    '''
+    header = True
+    with open(csv_path, 'w', newline = '') as out:
+        for data in iter_results(path, full_model = full_model):
+            if len(data) > 0 and any(
+                isinstance(data[column].iloc[0], InclusionVector)
+                for column in data.columns
+            ):
+                data['rxn_incl_order'] = RXN_INCL_ORDER
+            data.to_csv(out, header = header, index = False)
+            header = False
 
 def viz_universal_net(full_model, bm_rxn, show_all = False):
     '''